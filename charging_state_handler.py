@@ -1,27 +1,68 @@
 import asyncio
 import logging
-import time
-from typing import Optional
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
 
 from services.charging_supervisor import ChargingSupervisor, ChargingConfig
+from services.device_actions import DeviceAction, run_action, run_actions, sequence
+from services.grid_presence import GridPresence
+from services.power_trend import PowerTrend
+from utils.clock import Clock
+from utils.persistence import read_json, write_json_atomic
+
+# Turn Bluetti AC off once it has reported ~0W draw for this long during an outage.
+OFFLINE_ZERO_DRAW_SEC = 300
+OFFLINE_RECOVERY_FIELDS = ("ac_output_on", "ac_output_power")
+SNAPSHOT_VERSION = 1
+
+
+def _boot_id() -> Optional[str]:
+    """Kernel boot id (Linux); monotonic timestamps are only comparable within one boot."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id", "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class _CircuitLog(logging.LoggerAdapter):
+    """Prefix handler log lines with ``Charging`` or ``Charging[<circuit>]``."""
+
+    def process(self, msg, kwargs):
+        return f"{self.extra['prefix']}: {msg}", kwargs
+
+
+class ChargingEvent:
+    GRID = "grid"  # GridPresence confirmed grid-up or grid-down
+
+
+@dataclass(frozen=True)
+class Wait:
+    """How long a state waits before the next handle() and which events end the wait early."""
+
+    delay: float
+    events: Tuple[str, ...] = ()
 
 
 class ChargingState:
-    async def handle(self, handler: "ChargingStateHandler"):
+    async def handle(self, handler: "ChargingStateHandler") -> Optional[Wait]:
+        """Run one step; return the next wait, or None to run the next step immediately."""
         raise NotImplementedError
 
 
 class WaitPowerState(ChargingState):
     async def handle(self, handler: "ChargingStateHandler"):
-        logging.info("Charging: WAIT_POWER - waiting for TAPO offline->online cycle")
+        handler.log.info("WAIT_POWER - waiting for TAPO offline->online cycle")
         first_launch = handler.first_launch
         try:
             await handler.tapo_controller.get_status()
             tapo_status = handler.tapo_controller.status.get_status()
             is_online = tapo_status.get("online")
         except Exception:
-            logging.warning("Charging: TAPO status refresh failed; treating as offline", exc_info=True)
+            handler.log.warning("TAPO status refresh failed; treating as offline", exc_info=True)
             is_online = False
+        handler.grid.report_reachable(bool(is_online))
 
         if first_launch:
             handler.first_launch = False
@@ -34,17 +75,30 @@ class WaitPowerState(ChargingState):
         if not is_online:
             if not handler.offline_seen_in_wait:
                 handler.offline_seen_in_wait = True
-                logging.info("Charging: TAPO offline; triggering Bluetti AC keep-alive")
-                try:
-                    await handler.bluetti_controller.initialize()
-                    handler.bluetti_controller.turn_ac("ON")
-                except Exception:
-                    logging.warning("Charging: Failed to trigger Bluetti AC keep-alive", exc_info=True)
-                handler.schedule_offline_recovery_check()
+                if handler.controls_bluetti:
+                    handler.log.info("TAPO offline; triggering Bluetti AC keep-alive")
+                    handler.bluetti_controller.set_poll_profile("fast")
+                    # BLE pairing can take minutes; run it in the background so Tapo/grid checks continue.
+                    bluetti = handler.bluetti_controller
+                    handler.start_bluetti_action(
+                        DeviceAction(
+                            "bluetti_ac_on",
+                            sequence(bluetti.initialize, lambda: bluetti.turn_ac("ON", confirm=True)),
+                            handler.config.bluetti_action_timeout_sec,
+                        )
+                    )
+                    handler.schedule_offline_recovery_check()
+                else:
+                    handler.log.info("TAPO offline; Bluetti AC is managed by another circuit")
             else:
-                logging.info("Charging: TAPO offline; waiting to come online")
-            await asyncio.sleep(handler.config.check_interval_sec)
-            return
+                circuit = handler.tapo_controller.circuit_status()
+                handler.log.info(
+                    "TAPO offline; waiting to come online (circuit %s, retry in %ss)",
+                    circuit["state"],
+                    circuit["retry_in_sec"],
+                )
+            # Grid restore (Bluetti AC input back) cuts the wait short.
+            return Wait(handler.config.check_interval_sec, (ChargingEvent.GRID,))
 
         if handler.offline_seen_in_wait:
             handler.low_power_counter = 0
@@ -52,58 +106,82 @@ class WaitPowerState(ChargingState):
             handler.set_state(StartChargingState(), "TAPO back online after offline")
             return
 
-        logging.info("Charging: TAPO online but no offline event observed yet; staying in WAIT_POWER")
-        await asyncio.sleep(handler.config.check_interval_sec)
+        handler.log.info("TAPO online but no offline event observed yet; staying in WAIT_POWER")
+        return Wait(handler.config.check_interval_sec, (ChargingEvent.GRID,))
 
 
 class StartChargingState(ChargingState):
     async def handle(self, handler: "ChargingStateHandler"):
-        logging.info("Charging: START_CHARGING - turning socket on")
-        try:
-            await handler.tapo_controller.start_charging()
-            await handler.bluetti_controller.initialize()
-            handler.bluetti_controller.turn_ac("OFF")
-            handler.socket_on_at = time.monotonic()
-            handler.first_power_check_at = handler.socket_on_at + handler.config.first_power_check_delay_sec
-            handler.low_power_counter = 0
-            handler.stable_checks_remaining = handler.config.stable_power_checks
-            handler.set_state(MonitorChargingState(), "Socket turned on")
-        except Exception:
-            logging.warning("Charging: Failed to start charging, returning to WAIT_POWER", exc_info=True)
+        handler.log.info("START_CHARGING - turning socket on")
+        # A keep-alive still pairing must not switch AC back on after it is turned off here.
+        handler.cancel_bluetti_action()
+        bluetti = handler.bluetti_controller
+        actions = [DeviceAction("tapo_on", handler.tapo_controller.start_charging, handler.config.tapo_action_timeout_sec)]
+        if handler.controls_bluetti:
+            actions.append(
+                DeviceAction(
+                    "bluetti_ac_off",
+                    sequence(bluetti.initialize, lambda: bluetti.turn_ac("OFF")),
+                    handler.config.bluetti_action_timeout_sec,
+                )
+            )
+        results = await run_actions(*actions, clock=handler.clock)
+        handler.log.info("Start actions: %s", "; ".join(result.describe() for result in results.values()))
+        if not results["tapo_on"].ok:
+            handler.log.warning("Failed to start charging (%s), returning to WAIT_POWER", results["tapo_on"].describe())
             handler.set_state(WaitPowerState(), "Start failed")
-            await asyncio.sleep(handler.config.check_interval_sec)
+            return Wait(handler.config.check_interval_sec, (ChargingEvent.GRID,))
+        if handler.controls_bluetti:
+            if not results["bluetti_ac_off"].ok:
+                handler.log.warning("Bluetti AC off failed; charging continues")
+            bluetti.set_poll_profile("slow")
+        handler.socket_on_at = handler.clock.monotonic()
+        handler.first_power_check_at = handler.socket_on_at + handler.config.first_power_check_delay_sec
+        handler.power_trend.reset()
+        handler.supervisor.reset_filter()
+        handler.low_power_counter = 0
+        handler.stable_checks_remaining = handler.config.stable_power_checks
+        handler.set_state(MonitorChargingState(), "Socket turned on")
 
 
 class MonitorChargingState(ChargingState):
     async def handle(self, handler: "ChargingStateHandler"):
         if handler.socket_on_at is None:
-            logging.info("Charging: No socket_on_at timestamp, restarting flow")
+            handler.log.info("No socket_on_at timestamp, restarting flow")
             handler.set_state(StartChargingState(), "Missing timestamp")
             return
 
-        now = time.monotonic()
+        if handler.grid.present is False:
+            handler.set_state(WaitPowerState(), "Grid lost")
+            return
+
+        now = handler.clock.monotonic()
         elapsed_on = now - handler.socket_on_at
 
         if handler.first_power_check_at is not None:
             remaining = handler.first_power_check_at - now
             if remaining > 0:
-                logging.info("Charging: Waiting %.1fs before first power check", remaining)
-                await asyncio.sleep(min(handler.config.check_interval_sec, remaining))
-                return
+                handler.log.info("Waiting %.1fs before first power check", remaining)
+                return Wait(min(handler.config.check_interval_sec, remaining), (ChargingEvent.GRID,))
             handler.first_power_check_at = None
 
         try:
             power = await handler.tapo_controller.get_current_power()
         except Exception:
-            logging.warning("Charging: Power read failed; reinitializing and retrying", exc_info=True)
+            handler.log.warning("Power read failed; reinitializing and retrying", exc_info=True)
             try:
                 await handler.tapo_controller.initialize()
                 power = await handler.tapo_controller.get_current_power()
             except Exception:
-                logging.warning("Charging: Retry power read failed, returning to WAIT_POWER", exc_info=True)
+                handler.log.warning("Retry power read failed, returning to WAIT_POWER", exc_info=True)
                 handler.set_state(WaitPowerState(), "Power read failed after retry")
                 return
 
+        # Decide on the filtered value so a single garbage reading cannot start a recheck cycle.
+        power = handler.supervisor.filter_power(power)
+        filter_stats = handler.supervisor.filter_stats()
+        if power is not None:
+            handler.power_trend.add(now, power)
         is_charging = handler.supervisor.is_charging(power)
 
         if is_charging:
@@ -112,91 +190,134 @@ class MonitorChargingState(ChargingState):
             handler.stable_checks_remaining = max(handler.stable_checks_remaining - 1, 0)
 
         if not is_charging:
-            logging.info(
-                "Charging: Stable check power=%.2fW (remaining=%s, threshold=%s)",
+            handler.log.info(
+                "Stable check power=%.2fW (remaining=%s, threshold=%s) filter=%s",
                 float(power) if power is not None else -1,
                 handler.stable_checks_remaining,
                 handler.config.charging_w_threshold,
+                filter_stats,
             )
             if handler.stable_checks_remaining == 0:
                 handler.set_state(StopChargingState(), "Stable checks completed below threshold")
                 return
-            await asyncio.sleep(handler.config.stable_power_interval_sec)
-            return
+            return Wait(handler.config.stable_power_interval_sec, (ChargingEvent.GRID,))
 
         if elapsed_on < handler.config.startup_grace_sec:
             remaining = handler.config.startup_grace_sec - elapsed_on
-            logging.info("Charging: In startup grace (%.1fs remaining)", remaining)
-            await asyncio.sleep(min(handler.config.check_interval_sec, remaining))
-            return
+            handler.log.info("In startup grace (%.1fs remaining)", remaining)
+            return Wait(min(handler.config.check_interval_sec, remaining), (ChargingEvent.GRID,))
 
         if is_charging:
             handler.low_power_counter = 0
         else:
             handler.low_power_counter += 1
 
-        logging.info(
-            "Charging: Power check power=%.2fW threshold=%s low_counter=%s elapsed_on=%.1fs",
+        next_check = handler.supervisor.next_check_interval(handler.power_trend, power)
+        trend = handler.power_trend.stats()
+        handler.log.info(
+            "Power check power=%.2fW threshold=%s low_counter=%s elapsed_on=%.1fs "
+            "ewma=%sW slope=%sW/min next_check=%.0fs filter=%s",
             float(power) if power is not None else -1,
             handler.config.charging_w_threshold,
             handler.low_power_counter,
             elapsed_on,
+            trend["ewma_w"],
+            trend["slope_w_per_min"],
+            next_check,
+            filter_stats,
         )
 
         if handler.supervisor.should_stop(power, handler.low_power_counter, elapsed_on):
             handler.set_state(RecheckState(), "Low power sustained, triggering recheck")
             return
 
-        await asyncio.sleep(handler.config.check_interval_sec)
+        return Wait(next_check, (ChargingEvent.GRID,))
 
 
 class RecheckState(ChargingState):
+    """Cycle the socket off and back on, then take a few quick readings.
+
+    Each pause is a ``Wait`` step, so a GRID event wakes the recheck; a lost grid
+    abandons it for WAIT_POWER instead of sitting out the remaining pauses.
+    """
+
+    def __init__(self):
+        self.due_at: Optional[float] = None
+        self.readings: List[Optional[float]] = []
+
+    def _pause(self, handler: "ChargingStateHandler") -> Optional[Wait]:
+        remaining = self.due_at - handler.clock.monotonic()
+        if remaining > 0:
+            return Wait(remaining, (ChargingEvent.GRID,))
+        return None
+
     async def handle(self, handler: "ChargingStateHandler"):
         if not handler.config.recheck_cycle_enabled:
             handler.set_state(StopChargingState(), "Recheck disabled; stopping after low power")
             return
 
-        logging.info("Charging: RECHECK - cycling socket for verification")
-        try:
-            await handler.tapo_controller.stop_charging()
-        except Exception:
-            logging.warning("Charging: Failed to turn off during recheck", exc_info=True)
-
-        await asyncio.sleep(handler.config.recheck_off_sec)
+        if handler.recheck_phase is None:
+            handler.log.info("RECHECK - cycling socket for verification")
+            handler.recheck_phase = "off"
+            handler.save_state()
+            try:
+                await handler.tapo_controller.stop_charging()
+            except Exception:
+                handler.log.warning("Failed to turn off during recheck", exc_info=True)
+            self.due_at = handler.clock.monotonic() + handler.config.recheck_off_sec
+            return self._pause(handler)
 
-        try:
-            await handler.tapo_controller.start_charging()
-            handler.socket_on_at = time.monotonic()
-            handler.first_power_check_at = handler.socket_on_at + handler.config.first_power_check_delay_sec
-        except Exception:
-            logging.warning("Charging: Failed to turn on during recheck, returning to WAIT_POWER", exc_info=True)
-            handler.set_state(WaitPowerState(), "Recheck restart failed")
+        if handler.grid.present is False:
+            handler.set_state(WaitPowerState(), "Grid lost during recheck")
             return
 
-        quick_readings = []
-        for idx in range(handler.config.recheck_quick_checks):
-            await asyncio.sleep(handler.config.recheck_quick_interval_sec)
+        # Woken early by a GRID event that did not take the grid away: sit out the rest of the pause.
+        pause = self._pause(handler)
+        if pause is not None:
+            return pause
+
+        if handler.recheck_phase == "off":
             try:
-                power = await handler.tapo_controller.get_current_power()
-                quick_readings.append(power)
-                logging.info(
-                    "Charging: Recheck [%s/%s] power=%.2fW threshold=%s",
-                    idx + 1,
-                    handler.config.recheck_quick_checks,
-                    float(power) if power is not None else -1,
-                    handler.config.charging_w_threshold,
-                )
-                if handler.supervisor.is_charging(power):
-                    handler.low_power_counter = 0
-                    handler.stable_checks_remaining = handler.config.stable_power_checks
-                    handler.set_state(MonitorChargingState(), "Charging detected during recheck")
-                    return
+                await handler.tapo_controller.start_charging()
+                handler.socket_on_at = handler.clock.monotonic()
+                handler.first_power_check_at = handler.socket_on_at + handler.config.first_power_check_delay_sec
+                handler.power_trend.reset()
+                handler.supervisor.reset_filter()
+                handler.recheck_phase = "quick"
+                handler.save_state()
             except Exception:
-                logging.warning("Charging: Recheck power read failed", exc_info=True)
-                handler.set_state(WaitPowerState(), "Recheck power read failed")
+                handler.log.warning("Failed to turn on during recheck, returning to WAIT_POWER", exc_info=True)
+                handler.set_state(WaitPowerState(), "Recheck restart failed")
                 return
+            self.due_at = handler.clock.monotonic() + handler.config.recheck_quick_interval_sec
+            return self._pause(handler)
+
+        try:
+            power = handler.supervisor.filter_power(await handler.tapo_controller.get_current_power())
+        except Exception:
+            handler.log.warning("Recheck power read failed", exc_info=True)
+            handler.set_state(WaitPowerState(), "Recheck power read failed")
+            return
+        self.readings.append(power)
+        handler.log.info(
+            "Recheck [%s/%s] power=%.2fW threshold=%s filter=%s",
+            len(self.readings),
+            handler.config.recheck_quick_checks,
+            float(power) if power is not None else -1,
+            handler.config.charging_w_threshold,
+            handler.supervisor.filter_stats(),
+        )
+        if handler.supervisor.is_charging(power):
+            handler.low_power_counter = 0
+            handler.stable_checks_remaining = handler.config.stable_power_checks
+            handler.set_state(MonitorChargingState(), "Charging detected during recheck")
+            return
 
-        keep_charging = handler.supervisor.recheck_confirms_charging(quick_readings)
+        if len(self.readings) < handler.config.recheck_quick_checks:
+            self.due_at = handler.clock.monotonic() + handler.config.recheck_quick_interval_sec
+            return self._pause(handler)
+
+        keep_charging = handler.supervisor.recheck_confirms_charging(self.readings)
         if keep_charging:
             handler.low_power_counter = 0
             handler.stable_checks_remaining = handler.config.stable_power_checks
@@ -208,18 +329,24 @@ class RecheckState(ChargingState):
 
 class StopChargingState(ChargingState):
     async def handle(self, handler: "ChargingStateHandler"):
-        logging.info("Charging: STOP_CHARGING - turning socket off")
+        handler.log.info("STOP_CHARGING - turning socket off")
         try:
             await handler.tapo_controller.stop_charging()
         except Exception:
-            logging.warning("Charging: Failed to stop charging cleanly", exc_info=True)
+            handler.log.warning("Failed to stop charging cleanly", exc_info=True)
 
         handler.low_power_counter = 0
         handler.socket_on_at = None
         handler.first_power_check_at = None
         handler.stable_checks_remaining = handler.config.stable_power_checks
         handler.set_state(WaitPowerState(), "Stopped charging; returning to wait")
-        await asyncio.sleep(handler.config.check_interval_sec)
+        return Wait(handler.config.check_interval_sec, (ChargingEvent.GRID,))
+
+
+STATES = {
+    cls.__name__: cls
+    for cls in (WaitPowerState, StartChargingState, MonitorChargingState, RecheckState, StopChargingState)
+}
 
 
 class ChargingStateHandler:
@@ -229,9 +356,22 @@ class ChargingStateHandler:
         bluetti_controller,
         config: Optional[ChargingConfig] = None,
         supervisor: Optional[ChargingSupervisor] = None,
+        clock: Optional[Clock] = None,
+        state_file: Optional[str] = None,
+        name: Optional[str] = None,
+        controls_bluetti: bool = True,
+        grid: Optional[GridPresence] = None,
     ):
+        self.name = name
+        self.log = _CircuitLog(logging.getLogger(), {"prefix": f"Charging[{name}]" if name else "Charging"})
+        # Only one circuit may switch the shared Bluetti AC output and poll profile; the rest just read it.
+        self.controls_bluetti = controls_bluetti
+        # Called after every state step, once its next wake-up is known (e.g. to publish circuit status).
+        self.on_step: Optional[Callable[["ChargingStateHandler"], None]] = None
         self.config = config or ChargingConfig.from_env()
+        self.clock = clock or Clock()
         self.supervisor = supervisor or ChargingSupervisor(self.config)
+        self.power_trend = PowerTrend(self.config.power_ewma_tau_sec, self.config.power_trend_window)
         self.state: ChargingState = WaitPowerState()
         self.tapo_controller = tapo_controller
         self.bluetti_controller = bluetti_controller
@@ -242,15 +382,30 @@ class ChargingStateHandler:
         self.offline_seen_in_wait = False
         self.first_launch = True
         self.offline_recovery_task: Optional[asyncio.Task] = None
+        self.bluetti_action_task: Optional[asyncio.Task] = None
+        # Event name -> notification count; a wait ends early if a count moved since its step began.
+        self.event_counts: Dict[str, int] = {}
+        self._notified = asyncio.Event()
+        self.next_wake_at: Optional[float] = None
+        # Shared between circuits when passed in; otherwise owned (started and stopped) by this handler.
+        probe = getattr(tapo_controller, "probe", None)
+        self.grid = grid or GridPresence(bluetti_controller, probes=[probe] if probe else [], clock=self.clock)
+        self._owns_grid = grid is None
+        self.grid_watch_task: Optional[asyncio.Task] = None
+        # Crash-safe snapshot so a restart resumes timing instead of paying grace/min-on again.
+        self.state_file = os.getenv("CHARGING_STATE_FILE", "logs/charging_state.json") if state_file is None else state_file
+        self.resume_max_gap_sec = max(float(os.getenv("CHARGING_RESUME_MAX_GAP_SEC", "1800")), 0)
+        self.recheck_phase: Optional[str] = None
 
     def set_state(self, state: ChargingState, reason: str | None = None):
-        logging.info(
-            "Charging: State transition %s -> %s%s",
+        self.log.info(
+            "State transition %s -> %s%s",
             self.state.__class__.__name__,
             state.__class__.__name__,
             f" ({reason})" if reason else "",
         )
         self.state = state
+        self.recheck_phase = None
         if isinstance(state, WaitPowerState):
             # Require a fresh offline->online observation each time we re-enter WAIT_POWER
             self.offline_seen_in_wait = False
@@ -260,7 +415,204 @@ class ChargingStateHandler:
                 self.offline_recovery_task = None
 
     async def handle_state(self):
-        await self.state.handle(self)
+        """Run one state step, then sleep until its deadline or one of its events fires."""
+        counts = dict(self.event_counts)
+        wait = await self.state.handle(self)
+        self.save_state()
+        if wait is None:
+            self._publish_status()
+        else:
+            await self.wait(wait, counts)
+
+    async def run(self):
+        self.restore_state()
+        self.start_grid_watch()
+        try:
+            while True:
+                await self.handle_state()
+        finally:
+            self.grid.unsubscribe(self._on_grid_change)
+            if self._owns_grid:
+                self.grid.stop()
+
+    def get_status(self) -> dict:
+        """Current state, counters and power statistics of this circuit."""
+        now = self.clock.monotonic()
+        return {
+            "name": self.name,
+            "state": self.state.__class__.__name__,
+            "recheck_phase": self.recheck_phase,
+            "controls_bluetti": self.controls_bluetti,
+            "socket_on_sec": None if self.socket_on_at is None else round(now - self.socket_on_at),
+            "next_wake_in_sec": None if self.next_wake_at is None else round(max(self.next_wake_at - now, 0)),
+            "low_power_counter": self.low_power_counter,
+            "stable_checks_remaining": self.stable_checks_remaining,
+            "offline_seen_in_wait": self.offline_seen_in_wait,
+            "grid_present": self.grid_present,
+            "power_trend": self.power_trend.stats(),
+            "power_filter": self.supervisor.filter_stats(),
+        }
+
+    def _publish_status(self):
+        if self.on_step is None:
+            return
+        try:
+            self.on_step(self)
+        except Exception:
+            self.log.warning("Status listener failed", exc_info=True)
+
+    def save_state(self):
+        """Atomically persist the state name, counters and timing (as durations) to ``state_file``."""
+        if not self.state_file:
+            return
+        now = self.clock.monotonic()
+        recheck_due_at = self.state.due_at if isinstance(self.state, RecheckState) else None
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "state": self.state.__class__.__name__,
+            "saved_at": self.clock.now().timestamp(),
+            "saved_monotonic": now,
+            "boot_id": _boot_id(),
+            "socket_on_elapsed_sec": None if self.socket_on_at is None else now - self.socket_on_at,
+            "first_power_check_in_sec": None if self.first_power_check_at is None else self.first_power_check_at - now,
+            "low_power_counter": self.low_power_counter,
+            "stable_checks_remaining": self.stable_checks_remaining,
+            "offline_seen_in_wait": self.offline_seen_in_wait,
+            "first_launch": self.first_launch,
+            "recheck_phase": self.recheck_phase,
+            "recheck_pause_in_sec": None if recheck_due_at is None else recheck_due_at - now,
+        }
+        try:
+            write_json_atomic(self.state_file, snapshot, durable=True)
+        except OSError:
+            self.log.warning("Failed to persist state to %s", self.state_file, exc_info=True)
+
+    def restore_state(self) -> bool:
+        """Resume from the snapshot in ``state_file``; return False (fresh start) if it is missing or too old."""
+        if not self.state_file:
+            return False
+        data = read_json(self.state_file)
+        if not data or data.get("version") != SNAPSHOT_VERSION:
+            return False
+        state_cls = STATES.get(data.get("state"))
+        downtime = self._downtime_since(data)
+        if state_cls is None or downtime is None or downtime > self.resume_max_gap_sec:
+            self.log.info("Ignoring persisted state (state=%s, downtime=%s)", data.get("state"), downtime)
+            return False
+
+        now = self.clock.monotonic()
+        if data.get("socket_on_elapsed_sec") is not None:
+            # The plug keeps running while the process is down, so downtime counts as on-time.
+            self.socket_on_at = now - float(data["socket_on_elapsed_sec"]) - downtime
+        if data.get("first_power_check_in_sec") is not None:
+            self.first_power_check_at = now + max(float(data["first_power_check_in_sec"]) - downtime, 0.0)
+        self.low_power_counter = int(data.get("low_power_counter", 0))
+        self.stable_checks_remaining = int(data.get("stable_checks_remaining", self.config.stable_power_checks))
+        self.first_launch = bool(data.get("first_launch", False))
+        if state_cls is RecheckState and data.get("recheck_phase") == "quick":
+            # The socket was already back on; keep monitoring rather than cycling it again.
+            state_cls = MonitorChargingState
+        self.state = state_cls()
+        if isinstance(self.state, RecheckState) and data.get("recheck_pause_in_sec") is not None:
+            # The socket is already off: sit out what is left of the pause instead of cycling it again.
+            self.recheck_phase = data.get("recheck_phase")
+            self.state.due_at = now + max(float(data["recheck_pause_in_sec"]) - downtime, 0.0)
+        self.offline_seen_in_wait = bool(data.get("offline_seen_in_wait", False))
+        if isinstance(self.state, WaitPowerState) and self.offline_seen_in_wait and self.controls_bluetti:
+            self.schedule_offline_recovery_check()
+        self.log.info(
+            "Resumed %s after %.0fs downtime (socket on for %s)",
+            self.state.__class__.__name__,
+            downtime,
+            "n/a" if self.socket_on_at is None else f"{now - self.socket_on_at:.0f}s",
+        )
+        return True
+
+    def _downtime_since(self, data: dict) -> Optional[float]:
+        """Seconds since the snapshot, from the monotonic clock when it is the same boot, else wall time.
+
+        A wall clock that moved backwards (NTP step, RTC-less boot) gives None.
+        """
+        saved_monotonic = data.get("saved_monotonic")
+        now_monotonic = self.clock.monotonic()
+        if (
+            saved_monotonic is not None
+            and data.get("boot_id") is not None
+            and data.get("boot_id") == _boot_id()
+            and now_monotonic >= saved_monotonic
+        ):
+            return now_monotonic - float(saved_monotonic)
+        saved_at = data.get("saved_at")
+        if saved_at is None:
+            return None
+        downtime = self.clock.now().timestamp() - float(saved_at)
+        return downtime if downtime >= 0 else None
+
+    def notify(self, event: str):
+        """Record ``event`` and wake a pending wait that listens for it."""
+        self.event_counts[event] = self.event_counts.get(event, 0) + 1
+        notified, self._notified = self._notified, asyncio.Event()
+        notified.set()
+
+    async def wait(self, wait: Wait, since: Dict[str, int]) -> Optional[str]:
+        """Return the event that ended the wait early, or None once ``wait.delay`` has passed."""
+        self.next_wake_at = self.clock.monotonic() + wait.delay
+        self._publish_status()
+        try:
+            while True:
+                for event in wait.events:
+                    if self.event_counts.get(event, 0) != since.get(event, 0):
+                        self.log.info("Woken early by %s event", event)
+                        return event
+                remaining = self.next_wake_at - self.clock.monotonic()
+                if remaining <= 0:
+                    return None
+                notified = asyncio.ensure_future(self._notified.wait())
+                timer = asyncio.ensure_future(self.clock.sleep(remaining))
+                try:
+                    await asyncio.wait((notified, timer), return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    notified.cancel()
+                    timer.cancel()
+        finally:
+            self.next_wake_at = None
+
+    @property
+    def grid_present(self) -> Optional[bool]:
+        return self.grid.present
+
+    def start_grid_watch(self):
+        """Subscribe to grid-up/grid-down from the detector and make sure it runs."""
+        self.grid.subscribe(self._on_grid_change)
+        self.grid_watch_task = self.grid.start()
+
+    def _on_grid_change(self, present: bool, reason: str):
+        if present:
+            # The plug backed off while unpowered; let the wait state reach it right away.
+            reset_backoff = getattr(self.tapo_controller, "reset_backoff", None)
+            if reset_backoff:
+                reset_backoff()
+        self.notify(ChargingEvent.GRID)
+
+    def start_bluetti_action(self, action: DeviceAction):
+        """Run a Bluetti action in the background (replacing any pending one) and log its result."""
+        self.cancel_bluetti_action()
+
+        async def _run():
+            result = await run_action(action, self.clock)
+            # A False value means the device did not confirm the command.
+            if result.ok and result.value is not False:
+                self.log.info("Bluetti action %s", result.describe())
+            else:
+                self.log.warning("Bluetti action %s", result.describe())
+            return result
+
+        self.bluetti_action_task = asyncio.create_task(_run())
+
+    def cancel_bluetti_action(self):
+        if self.bluetti_action_task and not self.bluetti_action_task.done():
+            self.bluetti_action_task.cancel()
+        self.bluetti_action_task = None
 
     def schedule_offline_recovery_check(self):
         if self.offline_recovery_task and not self.offline_recovery_task.done():
@@ -268,38 +620,28 @@ class ChargingStateHandler:
 
         async def _delayed_check():
             try:
-                poll_interval = self.config.stable_power_interval_sec
-                zero_duration = 0.0
-
+                # Zero-draw time is measured from reading timestamps; the watcher only wakes
+                # when a new AC reading arrives or the cut-off deadline is reached.
+                not_before = self.clock.monotonic()
                 while True:
-                    await asyncio.sleep(poll_interval)
-                    status = self.bluetti_controller.get_status()
-                    ac_on = status.get("ac_output_on")
-                    ac_power = status.get("ac_output_power")
-
-                    if not ac_on:
-                        zero_duration = 0.0
-                        continue
-
-                    try:
-                        power_val = float(ac_power) if ac_power is not None else 0.0
-                    except (TypeError, ValueError):
-                        power_val = 0.0
-
-                    if power_val <= 0.0:
-                        zero_duration += poll_interval
-                        if zero_duration >= 300:
-                            logging.info(
-                                "Charging: Offline recovery turning AC off after %.0fs at ~0W draw",
-                                zero_duration,
+                    zero_since = self.bluetti_controller.ac_zero_draw_since()
+                    timeout = None
+                    if zero_since is not None:
+                        zero_since = max(zero_since, not_before)
+                        timeout = zero_since + OFFLINE_ZERO_DRAW_SEC - self.clock.monotonic()
+                        if timeout <= 0:
+                            self.log.info(
+                                "Offline recovery turning AC off after %.0fs at ~0W draw",
+                                self.clock.monotonic() - zero_since,
                             )
-                            self.bluetti_controller.turn_ac("OFF")
-                            zero_duration = 0.0
-                    else:
-                        zero_duration = 0.0
+                            await self.bluetti_controller.turn_ac("OFF")
+                            # Give the device a full window again before retrying the cut.
+                            not_before = self.clock.monotonic()
+                            continue
+                    await self.bluetti_controller.wait_for_update(OFFLINE_RECOVERY_FIELDS, timeout)
             except asyncio.CancelledError:
                 raise
             except Exception:
-                logging.warning("Charging: Offline recovery check failed", exc_info=True)
+                self.log.warning("Offline recovery check failed", exc_info=True)
 
         self.offline_recovery_task = asyncio.create_task(_delayed_check())
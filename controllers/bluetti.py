@@ -1,6 +1,8 @@
 import asyncio
 import logging
+import os
 from services.bluettiMqtt import BluettiMQTTService
+from services.bluetti_link import BluettiLinkSupervisor
 
 CONNECTION_RETRY_ATTEMPTS = 5
 
@@ -12,8 +14,37 @@ class BluettiController:
         self.connection_set = False
         self.ac_turned_on = False
         self.dc_turned_on = False
+        # Keep a supervised long-lived link instead of stop/re-pair cycles.
+        self.hot_standby = os.getenv("BLUETTI_HOT_STANDBY", "true").lower() in ["1", "true", "yes", "on"]
+        self.link = BluettiLinkSupervisor(self.bluetti)
+        self.bluetti.add_broker_exit_listener(self._on_broker_exit)
+        self.initialize_wait_sec = max(
+            int(os.getenv("BLUETTI_INITIALIZE_WAIT_SEC", str(self.bluetti.broker_connection_timeout))), 0
+        )
+        # Poll cadences chosen by the charging state machine: fast while running on battery, slow on grid.
+        self.poll_intervals = {
+            "fast": max(int(os.getenv("BLUETTI_POLL_FAST_SEC", "10")), 1),
+            "slow": max(int(os.getenv("BLUETTI_POLL_SLOW_SEC", "60")), 1),
+        }
+        self.poll_profile: str | None = None
+
+    def _on_broker_exit(self, returncode):
+        logging.info(f"Bluetti: broker exited (code {returncode}); marking connection lost.")
+        self.connection_set = False
+        self.turned_on = False
+        if self.link.running:
+            self.link.wake()
+
+    def start_standby(self):
+        """Start warming the Bluetti link in the background (hot-standby mode only)."""
+        if self.hot_standby:
+            self.link.start()
 
     async def initialize(self):
+        if self.hot_standby:
+            await self._initialize_standby()
+            return
+
         if self.connection_set:
             if self.bluetti.device_connected:
                 logging.info("BluettiController already connected; skipping initialize.")
@@ -40,36 +71,79 @@ class BluettiController:
         self.connection_set = False
         self.turned_on = False
 
-    def turn_dc(self, state: str):
+    async def _initialize_standby(self):
+        self.link.start()
+        if self.link.is_healthy():
+            logging.debug("BluettiController: warm link available; skipping initialize.")
+        else:
+            logging.info(
+                "BluettiController: waiting up to %ss for the background link to become ready.",
+                self.initialize_wait_sec,
+            )
+            await self.link.wait_ready(self.initialize_wait_sec)
+        self.connection_set = self.link.ready.is_set()
+        self.turned_on = self.connection_set
+        if not self.connection_set:
+            logging.info("BluettiController: link not ready yet; reconnection continues in background.")
+
+    def set_poll_profile(self, profile: str) -> bool:
+        """Switch the Bluetti poll cadence to the "fast" or "slow" profile; False if it cannot change live."""
+        if profile == self.poll_profile:
+            return True
+        if not self.bluetti.set_poll_interval(self.poll_intervals[profile]):
+            return False
+        logging.info(f"Bluetti: Poll profile {self.poll_profile or 'default'} -> {profile}")
+        self.poll_profile = profile
+        return True
+
+    async def turn_dc(self, state: str, confirm: bool = False, timeout: float | None = None) -> bool:
         logging.info(f"Bluetti: Turning DC device {state}")
-        self.dc_turned_on = state == "ON"
-        self.bluetti.set_dc_output(state)
+        ok = await self.bluetti.set_dc_output(state, confirm=confirm, timeout=timeout)
+        if ok or not confirm:
+            self.dc_turned_on = state == "ON"
+        return ok
 
-    def turn_ac(self, state: str):
+    async def turn_ac(self, state: str, confirm: bool = False, timeout: float | None = None) -> bool:
+        """Switch AC output; with ``confirm`` resolve only once the device reports the new state."""
         logging.info(f"Bluetti: Turning AC device {state}")
-        self.ac_turned_on = state == "ON"
-        self.bluetti.set_ac_output(state)
+        ok = await self.bluetti.set_ac_output(state, confirm=confirm, timeout=timeout)
+        if ok or not confirm:
+            self.ac_turned_on = state == "ON"
+        return ok
 
-    def power_off(self):
+    async def power_off(self):
         logging.info("Bluetti: Turning off device")
         # self.bluetti.power_off() sometimes it works, sometimes it doesn't
-        self.stop()
+        await self.stop()
         # self.bluetti.reset_status()
         self.turned_on = False
         self.connection_set = False
         self.bluetti.status.reset_output_status()
 
+    async def wait_for_update(self, fields, timeout: float | None = None) -> bool:
+        return await self.bluetti.wait_for_update(fields, timeout)
+
+    def ac_zero_draw_since(self) -> float | None:
+        """Monotonic time since which AC output has been reported on with no draw, from message timestamps."""
+        status = self.bluetti.status
+        on_since = status.held_since("ac_output_on", lambda value: value > 0)
+        zero_since = status.held_since("ac_output_power", lambda value: value <= 0)
+        if on_since is None or zero_since is None:
+            return None
+        return max(on_since, zero_since)
+
     def get_status(self):
         status = self.bluetti.status.get_status()
         self.ac_turned_on = status["ac_output_on"]
         self.dc_turned_on = status["dc_output_on"]
         return status
 
-    def stop(self):
+    async def stop(self):
         logging.info("Bluetti: Stopping MQTT client and broker")
+        self.link.stop()
         self.bluetti.stop_client()
-        self.bluetti.stop_broker()
-        self.bluetti.disconnect_device()
+        await self.bluetti.stop_broker()
+        await self.bluetti.disconnect_device()
         self.connection_set = False
         self.turned_on = False
         self.ac_turned_on = False
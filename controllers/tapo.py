@@ -4,8 +4,8 @@ from models.tapo import TapoStatus
 
 
 class TapoController:
-    def __init__(self):
-        self.tapo = TapoService()
+    def __init__(self, tapo_service: TapoService | None = None):
+        self.tapo = tapo_service or TapoService()
         self.status = TapoStatus()
 
     async def initialize(self):
@@ -16,17 +16,35 @@ class TapoController:
             logging.debug("TAPO: Failed to initialize")
             self.status.set_online(False)
 
+    def circuit_status(self) -> dict:
+        """Expose the plug's circuit breaker state (closed/open/half_open, retry delay)."""
+        return self.tapo.breaker.status()
+
+    async def probe(self) -> bool:
+        """Cheap reachability check (TCP connect, no login) used as grid evidence; bypasses the breaker."""
+        return await self.tapo.probe(use_breaker=False)
+
+    def reset_backoff(self):
+        """Let the next call through immediately, e.g. once the grid is known to be back."""
+        self.tapo.breaker.reset("grid restored")
+
     async def get_status(self):
+        # Fast offline detection before a fresh login: a failed TCP connect costs well under a second.
+        # A cached session skips it; the read itself feeds the breaker and drops the session on failure.
+        if not self.tapo.session_valid() and not await self.tapo.probe():
+            self.status.reset()
+            self.tapo.invalidate()
+            logging.debug("TAPO: Device unreachable")
+            return
         try:
-            await self.tapo.initialize()
+            await self.tapo.initialize(probe=False)
             self.status.set_online(True)
             device_info = await self.tapo.get_state()
             self.status.set_charging(device_info.device_on)
         except Exception:
             self.status.reset()
             # Force a fresh login next time after auth/network failures
-            self.tapo.initialized = False
-            self.tapo.device = None
+            self.tapo.invalidate()
             logging.debug("TAPO: Failed to get status")
 
     async def start_charging(self):
@@ -39,16 +57,15 @@ class TapoController:
         await self.tapo.turn_off()
         await self.tapo.get_state()
 
-    async def get_current_power(self):
+    async def get_current_power(self, max_age: float | None = None):
         """Fetch the current power draw from the TAPO device."""
         try:
             await self.tapo.initialize()
-            power = await self.tapo.get_current_power()
+            power = await self.tapo.get_current_power(max_age=max_age)
             logging.info(f"TAPO: Current power usage: {power}W")
             return power
         except Exception:
             # Reset session so we re-login after a 403/offline event
-            self.tapo.initialized = False
-            self.tapo.device = None
+            self.tapo.invalidate()
             logging.debug("TAPO: Failed to get current power")
             raise
@@ -43,6 +43,8 @@ const DEBUG_BATTERY = urlParams.get('debug_battery') === '1';
 const stateRegex = /^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - [A-Z]+ - Charging: ([^-]+?)(?: - (.*))?$/;
 const tsRegex = /^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})/;
 let boilerRunInterval = null;
+// Parsed status written by the service (bluetti_status.json); null until the first successful fetch.
+let parsedBluettiStatus = null;
 
 function setView(view) {
     currentView = view;
@@ -220,7 +222,12 @@ function pickLatestTimestamp(timestamps) {
     return dated[0].ts;
 }
 
-function extractPowerSummary(lines) {
+function packPercent(parsed, pack) {
+    const record = parsed && parsed.packs ? parsed.packs[String(pack)] : null;
+    return record && typeof record.percent === 'number' ? record.percent : null;
+}
+
+function extractPowerSummary(lines, parsed = null) {
     const summary = {
         acOutputOn: null,
         acOutputTs: null,
@@ -239,6 +246,10 @@ function extractPowerSummary(lines) {
         forcedAcOffTs: null
     };
 
+    // Pack SOC is parsed at ingest by the service; only fall back to scanning the log without it.
+    summary.pack2Battery = packPercent(parsed, 2);
+    summary.pack3Battery = packPercent(parsed, 3);
+
     for (let i = lines.length - 1; i >= 0; i--) {
         const line = lines[i];
         const tsMatch = tsRegex.exec(line);
@@ -511,7 +522,7 @@ async function fetchLogs() {
             : '';
         logContent.textContent = notice + reversed;
 
-        const powerSummary = extractPowerSummary(lines);
+        const powerSummary = extractPowerSummary(lines, parsedBluettiStatus);
         renderPowerSummary(powerSummary);
 
         const stateEntries = [];
@@ -706,10 +717,20 @@ async function fetchBoilerState() {
     }
 }
 
+async function fetchBluettiStatus() {
+    try {
+        const response = await fetch('bluetti_status.json', { cache: 'no-cache' });
+        parsedBluettiStatus = response.ok ? await response.json() : null;
+    } catch (error) {
+        parsedBluettiStatus = null;
+    }
+}
+
 // Default to transitions view on load
 setView(mobileQuery.matches ? 'status' : 'transitions');
+setInterval(fetchBluettiStatus, 5000);
+fetchBluettiStatus().finally(fetchLogs);
 setInterval(fetchLogs, 2000);
-fetchLogs();
 setInterval(fetchBoilerLogs, 5000);
 fetchBoilerLogs();
 setInterval(fetchBoilerState, 15000);
@@ -6,9 +6,9 @@ from dotenv import load_dotenv
 from controllers.bluetti import BluettiController
 from controllers.tapo import TapoController
 from utils.logger import setup_logging
-from charging_state_handler import ChargingStateHandler
+from services.charging_circuits import ChargingCircuits, load_circuits
 from services.boiler_scheduler import BoilerScheduler, BoilerConfig
-from services.tapo import TapoService
+from services.tapo_manager import get_tapo_manager
 
 async def test_bluetti_dc_cycle(bluetti_controller: BluettiController):
     """Initialize Bluetti, then toggle DC on/off five times with 5s intervals."""
@@ -20,14 +20,14 @@ async def test_bluetti_dc_cycle(bluetti_controller: BluettiController):
     cycles = 5
     for i in range(1, cycles + 1):
         logging.info(f"[Cycle {i}/{cycles}] Turning Bluetti DC output ON")
-        bluetti_controller.turn_dc("ON")
+        await bluetti_controller.turn_dc("ON")
         await asyncio.sleep(5)
         logging.info(f"[Cycle {i}/{cycles}] Turning Bluetti DC output OFF")
-        bluetti_controller.turn_dc("OFF")
+        await bluetti_controller.turn_dc("OFF")
         await asyncio.sleep(5)
 
     # After the test cycles, gracefully stop MQTT client/broker so the adapter is freed.
-    bluetti_controller.stop()
+    await bluetti_controller.stop()
 
 
 async def main(tapo_controller, bluetti_controller):
@@ -38,17 +38,21 @@ async def main(tapo_controller, bluetti_controller):
 
     boiler_task = None
 
-    def handle_stop_signal(signum, frame):
+    async def handle_stop_signal():
         logging.info("Stop signal received, performing cleanup...")
         if boiler_task:
             boiler_task.cancel()
-        bluetti_controller.stop()
+        await bluetti_controller.stop()
         logging.info("Cleanup complete, exiting.")
         exit(0)
 
-    # Register signal handlers
-    signal.signal(signal.SIGTERM, handle_stop_signal)
-    signal.signal(signal.SIGINT, handle_stop_signal)
+    # Register signal handlers on the loop so cleanup can await broker teardown
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, lambda: asyncio.create_task(handle_stop_signal()))
+
+    # Warm the Bluetti link in the background so an outage does not wait for pairing
+    bluetti_controller.start_standby()
 
     # Optional one-shot DC test; disable via env RUN_DC_TEST=false
     # Default off so the state machine starts immediately; enable if you need the DC pulse.
@@ -59,7 +63,7 @@ async def main(tapo_controller, bluetti_controller):
     # Optional boiler scheduler (runs concurrently with charging logic)
     boiler_config = BoilerConfig.from_env()
     if boiler_config.enabled:
-        boiler_tapo = TapoService(
+        boiler_tapo = get_tapo_manager().service(
             username=boiler_config.username,
             password=boiler_config.password,
             ip_address=boiler_config.ip_address,
@@ -70,12 +74,19 @@ async def main(tapo_controller, bluetti_controller):
     else:
         logging.info("Boiler scheduler disabled.")
 
-    # Main charging state machine
-    charging_handler = ChargingStateHandler(tapo_controller, bluetti_controller)
-    while True:
-        await charging_handler.handle_state()
+    # Charging state machines: one per configured circuit (CHARGING_CIRCUITS), sharing Tapo and Bluetti
+    charging_circuits = ChargingCircuits.from_env(bluetti_controller, tapo_controller)
+
+    # Warm every registered plug's session concurrently before the loops start polling
+    poll_results = await get_tapo_manager().poll_all()
+    for ip_address, result in poll_results.items():
+        logging.info("TAPO: Startup poll %s -> %s", ip_address, "offline" if isinstance(result, Exception) else "online")
+
+    await charging_circuits.run()
 
 
 load_dotenv()
 
-asyncio.run(main(TapoController(), BluettiController()))
+# Circuits bring their own plugs; the default charging plug is only registered without CHARGING_CIRCUITS.
+default_tapo_controller = None if load_circuits() else TapoController(get_tapo_manager().service())
+asyncio.run(main(default_tapo_controller, BluettiController()))
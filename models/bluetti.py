@@ -1,7 +1,147 @@
 import logging
+import time
+from array import array
+from typing import Callable, Iterator, Optional, Tuple
+
+
+class FieldHistory:
+    """Fixed-capacity ring buffer of (monotonic ts, value) samples backed by ``array('d')``."""
+
+    __slots__ = ("capacity", "_ts", "_values", "_head", "_size")
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = max(capacity, 1)
+        self._ts = array("d", [0.0]) * self.capacity
+        self._values = array("d", [0.0]) * self.capacity
+        self._head = 0  # next write position
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, ts: float, value: float):
+        """Store a sample in O(1), overwriting the oldest one when full."""
+        self._ts[self._head] = ts
+        self._values[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def last(self) -> Optional[Tuple[float, float]]:
+        if not self._size:
+            return None
+        idx = (self._head - 1) % self.capacity
+        return self._ts[idx], self._values[idx]
+
+    def iter_recent(self, since_ts: float = float("-inf")) -> Iterator[Tuple[float, float]]:
+        """Yield samples newest-first while their timestamp is >= ``since_ts`` (no copying)."""
+        idx = self._head
+        for _ in range(self._size):
+            idx = (idx - 1) % self.capacity
+            ts = self._ts[idx]
+            if ts < since_ts:
+                return
+            yield ts, self._values[idx]
+
+    def run_start(self, predicate: Callable[[float], bool]) -> Optional[float]:
+        """Timestamp of the oldest sample in the newest unbroken run matching ``predicate``.
+
+        Returns None when the latest sample does not match.
+        """
+        start = None
+        for ts, value in self.iter_recent():
+            if not predicate(value):
+                break
+            start = ts
+        return start
+
+    def window_stats(self, seconds: float, now: float) -> Optional[dict]:
+        """Return min/max/mean/count over samples from the last ``seconds``, or None if empty."""
+        count = 0
+        total = 0.0
+        low = float("inf")
+        high = float("-inf")
+        for _, value in self.iter_recent(now - seconds):
+            count += 1
+            total += value
+            if value < low:
+                low = value
+            if value > high:
+                high = value
+        if not count:
+            return None
+        return {"min": low, "max": high, "mean": total / count, "count": count}
+
+
+class BluettiPackStatus:
+    """Typed view of one ``pack_details<N>`` payload (status, SOC, voltages)."""
+
+    __slots__ = ("pack", "status", "percent", "voltage", "cell_voltages", "updated_at")
+
+    def __init__(self, pack: int):
+        self.pack = pack
+        self.status: Optional[str] = None
+        self.percent: Optional[float] = None
+        self.voltage: Optional[float] = None
+        self.cell_voltages: Tuple[float, ...] = ()
+        self.updated_at: Optional[float] = None
+
+    def update(self, data: dict, ts: float):
+        """Apply the keys present in ``data``; missing keys keep their previous value."""
+        if "status" in data:
+            self.status = str(data["status"])
+        if "percent" in data:
+            self.percent = float(data["percent"])
+        if "voltage" in data:
+            self.voltage = float(data["voltage"])
+        if "voltages" in data:
+            self.cell_voltages = tuple(float(v) for v in data["voltages"])
+        self.updated_at = ts
+
+    def as_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "percent": self.percent,
+            "voltage": self.voltage,
+            "cell_voltages": list(self.cell_voltages),
+        }
+
+
+# Advanced fields published by bluetti-mqtt in "advanced" Home Assistant mode.
+EXTENDED_FIELDS = (
+    "power_generation",
+    "ac_output_mode",
+    "ups_mode",
+    "grid_charge_on",
+    "ac_input_voltage",
+    "ac_input_frequency",
+    "internal_ac_voltage",
+    "internal_ac_frequency",
+    "total_battery_voltage",
+    "total_battery_current",
+    "battery_range_start",
+    "battery_range_end",
+)
+
 
 class BluettiStatus:
-    def __init__(self):
+    __slots__ = (
+        "total_battery_percent",
+        "ac_output_on",
+        "dc_output_on",
+        "ac_output_power",
+        "dc_output_power",
+        "ac_input_power",
+        "dc_input_power",
+        *EXTENDED_FIELDS,
+        "packs",
+        "info_received",
+        "device_connected",
+        "history",
+        "history_capacity",
+    )
+
+    def __init__(self, history_capacity: int = 256):
         """Initialize all status attributes."""
         self.total_battery_percent = None
         self.ac_output_on = None
@@ -10,15 +150,80 @@ class BluettiStatus:
         self.dc_output_power = None
         self.ac_input_power = None
         self.dc_input_power = None
+        for attr in EXTENDED_FIELDS:
+            setattr(self, attr, None)
+        # Battery packs by pack number, parsed from pack_details<N> payloads.
+        self.packs: dict[int, BluettiPackStatus] = {}
         self.info_received = False
+        self.device_connected = False
+        # Per-field ring buffers of recent readings, created on first update.
+        self.history: dict[str, FieldHistory] = {}
+        self.history_capacity = history_capacity
 
-    def update_status(self, attr, value):
-        """Update the status attribute with the given value."""
+    def update_status(self, attr, value, ts: float | None = None):
+        """Update the status attribute with the given value and record it in the field history."""
 
         if not self.info_received:
             self.info_received = True
 
         setattr(self, attr, value)
+        # Enum fields (e.g. ac_output_mode) are kept as names without history.
+        if value is None or isinstance(value, str):
+            return
+        self._record(attr, time.monotonic() if ts is None else ts, float(value))
+
+    def update_pack(self, pack: int, data: dict, ts: float | None = None) -> BluettiPackStatus:
+        """Merge a decoded pack_details payload; pack SOC is kept in history as ``pack<N>_percent``."""
+        if not self.info_received:
+            self.info_received = True
+
+        ts = time.monotonic() if ts is None else ts
+        record = self.packs.get(pack)
+        if record is None:
+            record = self.packs[pack] = BluettiPackStatus(pack)
+        record.update(data, ts)
+        if record.percent is not None and "percent" in data:
+            self._record(f"pack{pack}_percent", ts, record.percent)
+        return record
+
+    def pack_percent(self, pack: int) -> Optional[float]:
+        record = self.packs.get(pack)
+        return record.percent if record else None
+
+    def _record(self, key: str, ts: float, value: float):
+        history = self.history.get(key)
+        if history is None:
+            history = self.history[key] = FieldHistory(self.history_capacity)
+        history.append(ts, value)
+
+    def last_updated(self, attr) -> Optional[float]:
+        """Monotonic timestamp of the latest reading for ``attr`` (None if never received)."""
+        history = self.history.get(attr)
+        last = history.last() if history else None
+        return last[0] if last else None
+
+    def age(self, attr, now: float | None = None) -> Optional[float]:
+        updated = self.last_updated(attr)
+        if updated is None:
+            return None
+        return (time.monotonic() if now is None else now) - updated
+
+    def is_stale(self, attr, max_age: float, now: float | None = None) -> bool:
+        """Return True if ``attr`` was never received or is older than ``max_age`` seconds."""
+        age = self.age(attr, now)
+        return age is None or age > max_age
+
+    def held_since(self, attr, predicate: Callable[[float], bool]) -> Optional[float]:
+        """Monotonic time since which every reading of ``attr`` has matched ``predicate`` (None if the latest does not)."""
+        history = self.history.get(attr)
+        return history.run_start(predicate) if history else None
+
+    def window_stats(self, attr, seconds: float, now: float | None = None) -> Optional[dict]:
+        """Min/max/mean of ``attr`` over the last ``seconds`` seconds."""
+        history = self.history.get(attr)
+        if history is None:
+            return None
+        return history.window_stats(seconds, time.monotonic() if now is None else now)
 
     def get_status(self):
         """Return the current status of the Bluetti device as a dictionary."""
@@ -30,6 +235,8 @@ class BluettiStatus:
             "dc_output_power": self.dc_output_power,
             "ac_input_power": self.ac_input_power,
             "dc_input_power": self.dc_input_power,
+            **{attr: getattr(self, attr) for attr in EXTENDED_FIELDS},
+            "packs": {pack: record.as_dict() for pack, record in sorted(self.packs.items())},
             "info_received": self.info_received,
         }
 
@@ -42,6 +249,10 @@ class BluettiStatus:
         self.dc_output_power = None
         self.ac_input_power = None
         self.dc_input_power = None
+        for attr in EXTENDED_FIELDS:
+            setattr(self, attr, None)
+        self.packs.clear()
+        self.history.clear()
         self.device_connected = False
         self.info_received = False
         logging.debug("Bluetti status reset to default.")
@@ -49,3 +260,8 @@ class BluettiStatus:
     def reset_output_status(self):
         self.ac_output_on = False
         self.dc_output_on = False
+        # Close any "on" run in the history so held_since() does not outlive the power-off.
+        now = time.monotonic()
+        for attr in ("ac_output_on", "dc_output_on"):
+            if attr in self.history:
+                self._record(attr, now, 0.0)
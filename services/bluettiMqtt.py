@@ -1,11 +1,53 @@
 import asyncio
+import json
 import os
-import subprocess
 import logging
+import re
 import shutil
-import threading
+import time
+from collections import Counter
+from typing import Callable
 from models.bluetti import BluettiStatus
+from services.mqtt_recorder import MqttRecorder
+from utils.metrics import LatencyHistogram
+from utils.persistence import write_json_atomic
 import paho.mqtt.client as mqtt
+from asyncio_mqtt import Client as AsyncMqttClient, MqttError
+
+MQTT_TRANSPORTS = ("paho", "asyncio")
+BLUETTI_MODES = ("broker", "direct")
+
+
+def _parse_on_off(payload: str) -> bool:
+    return payload == "ON"
+
+
+# Final topic segment (bluetti/state/<device>/<field>) -> (BluettiStatus attribute, parser)
+FIELD_PARSERS = {
+    "total_battery_percent": ("total_battery_percent", int),
+    "ac_output_on": ("ac_output_on", _parse_on_off),
+    "dc_output_on": ("dc_output_on", _parse_on_off),
+    "ac_output_power": ("ac_output_power", int),
+    "dc_output_power": ("dc_output_power", int),
+    "ac_input_power": ("ac_input_power", float),
+    "dc_input_power": ("dc_input_power", float),
+    # Advanced ("home_assistant_mode=advanced") fields
+    "power_generation": ("power_generation", float),
+    "ac_output_mode": ("ac_output_mode", str),
+    "ups_mode": ("ups_mode", str),
+    "grid_charge_on": ("grid_charge_on", _parse_on_off),
+    "ac_input_voltage": ("ac_input_voltage", float),
+    "ac_input_frequency": ("ac_input_frequency", float),
+    "internal_ac_voltage": ("internal_ac_voltage", float),
+    "internal_ac_frequency": ("internal_ac_frequency", float),
+    "total_battery_voltage": ("total_battery_voltage", float),
+    "total_battery_current": ("total_battery_current", float),
+    "battery_range_start": ("battery_range_start", int),
+    "battery_range_end": ("battery_range_end", int),
+}
+
+# pack_details<N> carries a JSON object: {"status", "percent", "voltage", "voltages"}
+PACK_DETAILS_RE = re.compile(r"^pack_details(\d+)$")
 
 
 class BluettiMQTTService:
@@ -21,7 +63,20 @@ class BluettiMQTTService:
         self.connect_retries = max(int(os.getenv("BLUETTI_BROKER_RETRIES", "3")), 1)
         self.connect_retry_delay = max(int(os.getenv("BLUETTI_BROKER_RETRY_DELAY", "5")), 1)
         self.broker_adapter = os.getenv("BLUETTI_BROKER_ADAPTER")
+        # "paho" runs the client on paho's background thread; "asyncio" keeps
+        # connection, subscription, messages and publishes on the event loop.
+        self.transport = os.getenv("BLUETTI_MQTT_TRANSPORT", "paho").strip().lower()
+        # "broker" reads state via the bluetti-mqtt subprocess and MQTT; "direct" polls
+        # BLE in-process and optionally publishes to the broker for other consumers.
+        self.mode = os.getenv("BLUETTI_MODE", "broker").strip().lower()
+        self.direct_publish = os.getenv("BLUETTI_DIRECT_PUBLISH", "false").lower() in ["1", "true", "yes", "on"]
+        self.direct_poller = None
         self.client = mqtt.Client()
+        self._async_client: AsyncMqttClient | None = None
+        self._mqtt_task: asyncio.Task | None = None
+        self.broker_process: asyncio.subprocess.Process | None = None
+        self._broker_tasks: list[asyncio.Task] = []
+        self.broker_exit_listeners: list[Callable[[int | None], None]] = []
 
         # Subscribe to necessary topics
         # Subscribe to all devices so we still see updates if the configured
@@ -30,25 +85,63 @@ class BluettiMQTTService:
 
         self.device_connected = False
         self.status = BluettiStatus()
+        # on_message runs on paho's network thread; events are set on this loop via call_soon_threadsafe.
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.connected_event = asyncio.Event()
+        self.field_events: dict[str, asyncio.Event] = {}
+        # Per-field "next update" events, swapped for a fresh one every time a value arrives.
+        self._update_events: dict[str, asyncio.Event] = {}
+        # Only every Nth message is logged at INFO; the rest go to DEBUG.
+        self.log_sample_every = max(int(os.getenv("BLUETTI_LOG_SAMPLE_EVERY", "100")), 1)
+        self.messages_received = 0
+        self.last_message_at: float | None = None
+        # Pending command acknowledgements: status attribute -> [(expected value, future)].
+        self._ack_waiters: dict[str, list[tuple[object, asyncio.Future]]] = {}
+        self.command_latency = LatencyHistogram()
+        # Without an explicit timeout, the ack wait follows the poll interval that is actually running
+        # (see _use_live_interval); a broker keeps its start-up interval until it restarts.
+        self._ack_timeout_configured = os.getenv("BLUETTI_COMMAND_ACK_TIMEOUT_SEC") is not None
+        self.live_interval = int(self.broker_interval or 30)
+        self.command_ack_timeout_sec = float(
+            os.getenv("BLUETTI_COMMAND_ACK_TIMEOUT_SEC", str(int(self.broker_interval or 30) + 15))
+        )
+        self.command_retries = max(int(os.getenv("BLUETTI_COMMAND_RETRIES", "2")), 0)
+        self.command_retry_backoff_sec = max(float(os.getenv("BLUETTI_COMMAND_RETRY_BACKOFF_SEC", "2")), 0)
+        self.unknown_topics: Counter = Counter()
+        # Parsed status snapshot for the log webapp, so the browser does not scan log.txt for it.
+        self.status_file = os.getenv("BLUETTI_STATUS_FILE", "logs/bluetti_status.json")
+        self.status_file_interval_sec = max(float(os.getenv("BLUETTI_STATUS_FILE_INTERVAL_SEC", "5")), 0)
+        # Set on ingest; a writer task on the loop flushes it off the message path (see _status_file_loop).
+        self._status_dirty = False
+        self._status_writer_task: asyncio.Task | None = None
+        # Optional raw capture of every bluetti/state message for replay (see services/mqtt_recorder.py).
+        record_file = os.getenv("BLUETTI_RECORD_FILE")
+        self.recorder: MqttRecorder | None = MqttRecorder(record_file) if record_file else None
 
     async def connect(self):
         if not self._validate_config():
             return False
         self._log_config()
+        self._loop = asyncio.get_running_loop()
         for attempt in range(1, self.connect_retries + 1):
             try:
-                if self.device_connected:
-                    self.device_connected = False
-                if not self.start_broker():
+                self._reset_events()
+                self.start_status_writer()
+                if self.mode == "direct":
+                    self.start_direct_poller()
+                elif not await self.start_broker():
                     logging.error("Failed to start broker; aborting connect attempt.")
                     return False
-                self.client.on_connect = self.on_connect
-                self.client.on_message = self.on_message
-                try:
-                    self.client.connect(self.broker_host, 1883, keepalive=60)
-                except Exception as e:
-                    logging.error(f"MQTT connection failed: {e}")
-                self.start_client()
+                elif self.transport == "asyncio":
+                    self.start_async_client()
+                else:
+                    self.client.on_connect = self.on_connect
+                    self.client.on_message = self.on_message
+                    try:
+                        self.client.connect(self.broker_host, 1883, keepalive=60)
+                    except Exception as e:
+                        logging.error(f"MQTT connection failed: {e}")
+                    self.start_client()
                 try:
                     await asyncio.wait_for(
                         self._wait_for_pairing(), timeout=self.broker_connection_timeout
@@ -59,11 +152,15 @@ class BluettiMQTTService:
                         "Timed out waiting for Bluetti pairing; stopping client and broker."
                     )
                     self.stop_client()
-                    self.stop_broker()
+                    await self.stop_broker()
+            except ImportError:
+                # Retrying cannot fix a missing or broken BLE stack; fail loudly instead.
+                logging.error("Bluetti %s mode cannot start: dependency import failed", self.mode, exc_info=True)
+                return False
             except Exception as e:
                 logging.debug(f"Exception occurred during connection attempt {attempt}: {e}")
                 self.stop_client()
-                self.stop_broker()
+                await self.stop_broker()
 
             if attempt < self.connect_retries:
                 logging.info(
@@ -78,8 +175,62 @@ class BluettiMQTTService:
         return False
 
     async def _wait_for_pairing(self):
-        while not self.device_connected:
-            await asyncio.sleep(0.1)
+        await self.connected_event.wait()
+
+    async def wait_for_field(self, field: str, timeout: float | None = None) -> bool:
+        """Wait until the first value for ``field`` arrives; return False on timeout."""
+        try:
+            await asyncio.wait_for(self._field_event(field).wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def wait_for_update(self, fields, timeout: float | None = None) -> bool:
+        """Wait for the next reading of any of ``fields``; return False on timeout."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        waiters = [asyncio.ensure_future(self._update_event(field).wait()) for field in fields]
+        try:
+            done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            return bool(done)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    def _update_event(self, field: str) -> asyncio.Event:
+        event = self._update_events.get(field)
+        if event is None:
+            event = self._update_events[field] = asyncio.Event()
+        return event
+
+    def _notify_update(self, field: str):
+        """Wake current waiters for ``field`` (runs on the loop)."""
+        event = self._update_events.pop(field, None)
+        if event is not None:
+            event.set()
+
+    def _field_event(self, field: str) -> asyncio.Event:
+        event = self.field_events.get(field)
+        if event is None:
+            event = self.field_events[field] = asyncio.Event()
+        return event
+
+    def seconds_since_last_message(self) -> float | None:
+        if self.last_message_at is None:
+            return None
+        return time.monotonic() - self.last_message_at
+
+    def _reset_events(self):
+        self.device_connected = False
+        self.connected_event.clear()
+        for event in self.field_events.values():
+            event.clear()
+
+    def _signal(self, event: asyncio.Event):
+        """Set an asyncio event from any thread."""
+        if event.is_set() or self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(event.set)
 
     def on_connect(self, client, userdata, flags, rc):
         if rc == 0:
@@ -90,14 +241,23 @@ class BluettiMQTTService:
             logging.debug(f"Failed to connect, return code {rc}")
 
     def on_message(self, client, userdata, message):
-        logging.info(f"Received message: {message.topic} {message.payload.decode()}")
-        topic = message.topic
-        payload = message.payload.decode()
+        self.handle_state(message.topic, message.payload.decode())
+
+    def handle_state(self, topic: str, payload: str):
+        """Apply one bluetti/state/<device>/<field> update, whatever transport delivered it."""
+        self.messages_received += 1
+        self.last_message_at = time.monotonic()
+        if self.recorder is not None:
+            self.recorder.record(topic, payload, self.last_message_at)
+        if self.messages_received % self.log_sample_every == 1 or self.log_sample_every == 1:
+            logging.info("Received message #%s: %s %s", self.messages_received, topic, payload)
+        else:
+            logging.debug("Received message: %s %s", topic, payload)
 
         topic_parts = topic.split("/")
         device_from_topic = topic_parts[2] if len(topic_parts) > 2 else None
         if self.device_name and device_from_topic and device_from_topic != self.device_name:
-            logging.debug(f"Ignoring state for unexpected device '{device_from_topic}' (expecting '{self.device_name}')")
+            logging.debug("Ignoring state for unexpected device '%s' (expecting '%s')", device_from_topic, self.device_name)
             return
         if not self.device_name and device_from_topic:
             self.device_name = device_from_topic
@@ -105,28 +265,162 @@ class BluettiMQTTService:
 
         if not self.device_connected:
             self.device_connected = True
+            self._signal(self.connected_event)
+
+        field = topic_parts[-1]
+        entry = FIELD_PARSERS.get(field)
+        if entry is None:
+            pack_match = PACK_DETAILS_RE.match(field)
+            if pack_match is None:
+                self.unknown_topics[field] += 1
+                return
+            self._handle_pack_details(int(pack_match.group(1)), payload)
+            return
+        attr, parse = entry
+        try:
+            value = parse(payload)
+        except ValueError:
+            logging.debug("Ignoring unparsable payload for %s: %r", field, payload)
+            return
+        self.status.update_status(attr, value, ts=self.last_message_at)
+        self._signal(self._field_event(attr))
+        if attr in self._update_events and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._notify_update, attr)
+        if self._ack_waiters.get(attr) and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._settle_acks, attr, value)
+        self._status_dirty = True
+
+    def _handle_pack_details(self, pack: int, payload: str):
+        try:
+            data = json.loads(payload)
+            if not isinstance(data, dict):
+                raise ValueError("pack_details payload is not an object")
+            self.status.update_pack(pack, data, ts=self.last_message_at)
+        except (ValueError, TypeError):
+            logging.debug("Ignoring unparsable pack_details%s payload: %r", pack, payload)
+            return
+        self._signal(self._field_event(f"pack{pack}_percent"))
+        self._status_dirty = True
+
+    def start_status_writer(self):
+        """Start the task that writes the parsed status for the webapp (needs a running loop)."""
+        if not self.status_file:
+            return
+        if self._status_writer_task is None or self._status_writer_task.done():
+            self._status_writer_task = asyncio.get_running_loop().create_task(self._status_file_loop())
+
+    async def _status_file_loop(self):
+        while True:
+            await asyncio.sleep(self.status_file_interval_sec or 1.0)
+            await self.flush_status_file()
 
-        topic_map = {
-            "total_battery_percent": ("total_battery_percent", int),
-            "ac_output_on": ("ac_output_on", lambda x: x == "ON"),
-            "dc_output_on": ("dc_output_on", lambda x: x == "ON"),
-            "ac_output_power": ("ac_output_power", int),
-            "dc_output_power": ("dc_output_power", int),
-            "ac_input_power": ("ac_input_power", float),
-            "dc_input_power": ("dc_input_power", float),
-        }
-
-        for key, (attr, transform) in topic_map.items():
-            if key in topic:
-                value = transform(payload)
-                self.status.update_status(attr, value)
-                break
+    async def flush_status_file(self):
+        """Write the status snapshot if anything arrived since the last write.
+
+        The fsync'ing write runs in the default executor so it never blocks message
+        ingest or the event loop.
+        """
+        if not self.status_file or not self._status_dirty:
+            return
+        self._status_dirty = False
+        try:
+            snapshot = self.status.get_status()
+        except RuntimeError:
+            # A new pack was added by the MQTT thread mid-copy; try again next tick.
+            self._status_dirty = True
+            return
+        snapshot["device_name"] = self.device_name
+        snapshot["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            # Atomic swap so the browser never reads a half-written file.
+            await asyncio.get_running_loop().run_in_executor(None, write_json_atomic, self.status_file, snapshot)
+        except OSError:
+            logging.warning("Failed to write Bluetti status file %s", self.status_file, exc_info=True)
+
+    def _settle_acks(self, attr: str, value):
+        """Resolve command waiters whose expected value just arrived (runs on the loop)."""
+        for expected, future in self._ack_waiters.get(attr, []):
+            if expected == value and not future.done():
+                future.set_result(value)
 
     def start_client(self):
         self.client.loop_start()
 
-    def start_broker(self):
-        """Start the bluetti-mqtt broker as a subprocess."""
+    def start_direct_poller(self):
+        """Start in-process BLE polling that feeds handle_state directly."""
+        # Imported lazily so broker mode does not need the BLE stack.
+        from services.bluetti_direct import BluettiDirectPoller
+
+        if self.direct_poller is None:
+            self.direct_poller = BluettiDirectPoller(
+                self.mac_address,
+                int(self.broker_interval),
+                self.handle_state,
+                publish_host=self.broker_host if self.direct_publish else None,
+                fields=FIELD_PARSERS,
+            )
+        self._use_live_interval(self.direct_poller.interval)
+        self.direct_poller.start()
+
+    def _use_live_interval(self, seconds: int):
+        """Record the cadence the device is really polled at; the default ack timeout follows it."""
+        self.live_interval = int(seconds)
+        if not self._ack_timeout_configured:
+            self.command_ack_timeout_sec = float(int(seconds) + 15)
+
+    def set_poll_interval(self, seconds: int) -> bool:
+        """Change the BLE poll cadence live; return True only if the device is now polled at ``seconds``.
+
+        Only direct mode can do this: the running device handler picks the new
+        interval up on its next poll. The bluetti-mqtt subprocess only takes
+        ``--interval`` at start and is not restarted for a cadence change (that
+        would drop the BLE link, typically mid-outage), so in broker mode this is
+        a no-op that returns False and leaves ``BLUETTI_BROKER_INTERVAL`` as is.
+        """
+        seconds = max(int(seconds), 1)
+        if self.mode != "direct":
+            logging.info("Bluetti: Poll interval stays %ss; the broker cannot change it while running", self.live_interval)
+            return False
+        poller = self.direct_poller
+        if poller is None:
+            # Not polling yet: the poller starts at this interval.
+            self.broker_interval = str(seconds)
+            return False
+        if seconds == poller.interval:
+            return True
+        previous = poller.interval
+        poller.interval = seconds
+        if poller.handler is not None:
+            poller.handler.interval = seconds
+        self._use_live_interval(seconds)
+        logging.info("Bluetti: Poll interval %ss -> %ss (applied live)", previous, seconds)
+        return True
+
+    def start_async_client(self):
+        """Run the MQTT client as a task on the current event loop."""
+        if self._mqtt_task and not self._mqtt_task.done():
+            return
+        self._mqtt_task = asyncio.create_task(self._run_async_client())
+
+    async def _run_async_client(self):
+        """Connect, subscribe and dispatch messages on the event loop; reconnect on errors."""
+        while True:
+            try:
+                async with AsyncMqttClient(self.broker_host, 1883, keepalive=60) as client:
+                    self._async_client = client
+                    async with client.filtered_messages(self.subscribe_topic) as messages:
+                        await client.subscribe(self.subscribe_topic)
+                        logging.debug(f"MQTT (asyncio) connected to {self.broker_host}; subscribed to {self.subscribe_topic}")
+                        async for message in messages:
+                            self.on_message(client, None, message)
+            except MqttError as e:
+                logging.error(f"MQTT connection failed: {e}")
+            finally:
+                self._async_client = None
+            await asyncio.sleep(self.connect_retry_delay)
+
+    async def start_broker(self):
+        """Start the bluetti-mqtt broker as an asyncio subprocess."""
         bluetti_exe = shutil.which("bluetti-mqtt")
         if not bluetti_exe:
             logging.error(
@@ -135,7 +429,7 @@ class BluettiMQTTService:
             return False
 
         # Clean up any previous broker before starting a new one
-        self.stop_broker()
+        await self.stop_broker()
 
         command = [
             bluetti_exe,
@@ -154,113 +448,195 @@ class BluettiMQTTService:
             )
         try:
             logging.debug(f"Starting bluetti-mqtt with command: {' '.join(command)}")
-            self.broker_process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
             )
-            logging.debug(
-                f"Started bluetti-mqtt broker pid={self.broker_process.pid} cmd={' '.join(command)}"
-            )
-
-            threading.Thread(
-                target=self._pipe_to_log,
-                args=(self.broker_process.stdout, logging.debug, "bluetti-mqtt stdout"),
-                daemon=True,
-            ).start()
-            threading.Thread(
-                target=self._pipe_to_log,
-                args=(self.broker_process.stderr, logging.error, "bluetti-mqtt stderr"),
-                daemon=True,
-            ).start()
-            threading.Thread(
-                target=self._log_exit_code,
-                daemon=True,
-            ).start()
-
-            return True
         except Exception as e:
             logging.error(f"Failed to start bluetti-mqtt broker: {e}")
             return False
 
-    def stop_broker(self):
-        """Stop the bluetti-mqtt broker subprocess."""
-        if hasattr(self, "broker_process") and self.broker_process:
+        self.broker_process = process
+        self._use_live_interval(int(self.broker_interval))
+        logging.debug(f"Started bluetti-mqtt broker pid={process.pid} cmd={' '.join(command)}")
+        self._broker_tasks = [
+            asyncio.create_task(self._pipe_to_log(process.stdout, logging.debug, "bluetti-mqtt stdout")),
+            asyncio.create_task(self._pipe_to_log(process.stderr, logging.error, "bluetti-mqtt stderr")),
+            asyncio.create_task(self._watch_broker_exit(process)),
+        ]
+        return True
+
+    async def stop_broker(self):
+        """Stop the bluetti-mqtt broker subprocess without blocking the event loop."""
+        process = self.broker_process
+        if not process:
+            logging.debug("No broker process found to stop.")
+            return
+        # Detach first so the exit watcher treats this as an intentional stop.
+        self.broker_process = None
+        if process.returncode is None:
             try:
-                self.broker_process.terminate()
-                self.broker_process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
+                process.terminate()
+                await asyncio.wait_for(process.wait(), timeout=5)
+            except ProcessLookupError:
+                pass
+            except asyncio.TimeoutError:
                 logging.warning("bluetti-mqtt broker did not exit on SIGTERM; killing.")
-                self.broker_process.kill()
-                self.broker_process.wait()
-            logging.debug("bluetti-mqtt broker stopped successfully.")
-            self.broker_process = None
-        else:
-            logging.debug("No broker process found to stop.")
+                process.kill()
+                await process.wait()
+        logging.debug("bluetti-mqtt broker stopped successfully.")
+
+    def add_broker_exit_listener(self, callback: Callable[[int | None], None]):
+        """Register a callback invoked on the loop when the broker exits unexpectedly."""
+        self.broker_exit_listeners.append(callback)
 
-    def disconnect_device(self):
+    async def disconnect_device(self):
         """Ask BlueZ to drop the BLE connection so the adapter is freed."""
         if not self.mac_address:
             return
         try:
-            subprocess.run(
-                ["bluetoothctl", "disconnect", self.mac_address],
-                check=False,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
+            process = await asyncio.create_subprocess_exec(
+                "bluetoothctl",
+                "disconnect",
+                self.mac_address,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
             )
+            await asyncio.wait_for(process.wait(), timeout=10)
             logging.debug(f"bluetoothctl disconnect issued for {self.mac_address}")
         except FileNotFoundError:
             logging.warning("bluetoothctl not available in container; cannot force disconnect.")
+        except asyncio.TimeoutError:
+            logging.warning(f"bluetoothctl disconnect for {self.mac_address} timed out.")
 
     def stop_client(self):
+        if self.recorder is not None:
+            self.recorder.flush()
+        if self._status_writer_task and not self._status_writer_task.done():
+            self._status_writer_task.cancel()
+        self._status_writer_task = None
+        if self.mode == "direct":
+            if self.direct_poller:
+                self.direct_poller.stop()
+            return
+        if self.transport == "asyncio":
+            if self._mqtt_task and not self._mqtt_task.done():
+                self._mqtt_task.cancel()
+            self._mqtt_task = None
+            return
         self.client.loop_stop()
         self.client.disconnect()
 
-    def _pipe_to_log(self, pipe, log_func, prefix):
-        """Forward a subprocess pipe to logging."""
-        if not pipe:
+    async def _pipe_to_log(self, stream, log_func, prefix):
+        """Forward a subprocess stream to logging."""
+        if not stream:
             return
-        for line in pipe:
-            log_func(f"{prefix}: {line.strip()}")
+        async for line in stream:
+            log_func(f"{prefix}: {line.decode(errors='replace').strip()}")
 
-    def _log_exit_code(self):
-        """Wait for broker process to exit and log the return code."""
-        if not hasattr(self, "broker_process") or not self.broker_process:
+    async def _watch_broker_exit(self, process):
+        """Log the broker's exit code and notify listeners if it died on its own."""
+        returncode = await process.wait()
+        logging.debug(f"bluetti-mqtt broker exited with code {returncode}")
+        if process is not self.broker_process:
             return
-        self.broker_process.wait()
-        logging.debug(
-            f"bluetti-mqtt broker exited with code {self.broker_process.returncode}"
-        )
+        logging.warning(f"bluetti-mqtt broker exited unexpectedly (code {returncode}).")
+        self.broker_process = None
+        self.device_connected = False
+        self.connected_event.clear()
+        for callback in list(self.broker_exit_listeners):
+            try:
+                callback(returncode)
+            except Exception:
+                logging.warning("Broker exit listener failed", exc_info=True)
+
+    async def publish(self, topic: str, payload: str) -> bool:
+        """Publish a message; in asyncio mode this waits for the broker to accept it."""
+        if self.mode == "direct":
+            if not self.direct_poller:
+                logging.error(f"Cannot send {topic}: direct poller is not running.")
+                return False
+            return await self.direct_poller.command(topic.rsplit("/", 1)[-1], payload)
+        if self.transport == "asyncio":
+            if not self._async_client:
+                logging.error(f"Cannot publish to {topic}: MQTT client is not connected.")
+                return False
+            try:
+                await self._async_client.publish(topic, payload)
+            except MqttError as e:
+                logging.error(f"Failed to publish to {topic}: {e}")
+                return False
+            return True
+        info = self.client.publish(topic, payload)
+        return info.rc == mqtt.MQTT_ERR_SUCCESS
 
-    def set_ac_output(self, state: str):
+    async def send_command(
+        self,
+        field: str,
+        state: str,
+        confirm: bool = False,
+        timeout: float | None = None,
+        retries: int | None = None,
+    ) -> bool:
+        """Publish an ON/OFF command; with ``confirm`` wait for the matching state message.
+
+        Unconfirmed commands are re-sent with exponential backoff. Returns True when
+        the command was published (or, with ``confirm``, acknowledged by the device).
+        """
+        topic = self._command_topic(field)
+        if not topic:
+            return False
+        if not confirm:
+            return await self.publish(topic, state)
+
+        timeout = self.command_ack_timeout_sec if timeout is None else timeout
+        retries = self.command_retries if retries is None else retries
+        expected = state == "ON"
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        for attempt in range(retries + 1):
+            future = self._loop.create_future()
+            waiters = self._ack_waiters.setdefault(field, [])
+            waiters.append((expected, future))
+            started = time.monotonic()
+            try:
+                if await self.publish(topic, state):
+                    await asyncio.wait_for(future, timeout=timeout)
+                    latency = time.monotonic() - started
+                    self.command_latency.record(latency)
+                    logging.info(f"Bluetti: {field}={state} acknowledged in {latency:.2f}s (attempt {attempt + 1})")
+                    return True
+            except asyncio.TimeoutError:
+                self.command_latency.record_timeout()
+                logging.warning(f"Bluetti: {field}={state} not acknowledged within {timeout:.0f}s (attempt {attempt + 1})")
+            finally:
+                waiters.remove((expected, future))
+            if attempt < retries:
+                await asyncio.sleep(self.command_retry_backoff_sec * (2 ** attempt))
+        return False
+
+    async def set_ac_output(self, state: str, confirm: bool = False, timeout: float | None = None) -> bool:
         """Turn AC output ON/OFF"""
         if state in ["ON", "OFF"]:
-            topic = self._command_topic("ac_output_on")
-            if not topic:
-                return
-            self.client.publish(topic, state)
-            self.ac_output_on = state == "ON"
-        else:
-            logging.debug("Invalid state for AC output")
+            ok = await self.send_command("ac_output_on", state, confirm=confirm, timeout=timeout)
+            if ok:
+                self.ac_output_on = state == "ON"
+            return ok
+        logging.debug("Invalid state for AC output")
+        return False
 
-    def set_dc_output(self, state: str):
+    async def set_dc_output(self, state: str, confirm: bool = False, timeout: float | None = None) -> bool:
         """Turn DC output ON/OFF"""
         if state in ["ON", "OFF"]:
-            topic = self._command_topic("dc_output_on")
-            if not topic:
-                return
-            self.client.publish(topic, state)
-        else:
-            logging.debug("Invalid state for DC output")
+            return await self.send_command("dc_output_on", state, confirm=confirm, timeout=timeout)
+        logging.debug("Invalid state for DC output")
+        return False
 
-    def power_off(self):
+    async def power_off(self):
         topic = self._command_topic("power_off")
         if topic:
-            self.client.publish(topic, "ON")
+            await self.publish(topic, "ON")
 
     def _validate_config(self) -> bool:
         """Validate required configuration before trying to connect."""
@@ -273,6 +649,14 @@ class BluettiMQTTService:
             missing.append("BLUETTI_BROKER_INTERVAL")
         if not self.broker_host:
             missing.append("BLUETTI_BROKER_HOST")
+        if self.mode not in BLUETTI_MODES:
+            logging.error(f"Unknown BLUETTI_MODE '{self.mode}'; expected one of {', '.join(BLUETTI_MODES)}")
+            return False
+        if self.transport not in MQTT_TRANSPORTS:
+            logging.error(
+                f"Unknown BLUETTI_MQTT_TRANSPORT '{self.transport}'; expected one of {', '.join(MQTT_TRANSPORTS)}"
+            )
+            return False
         if missing:
             logging.error(f"Missing required Bluetti config values: {', '.join(missing)}")
             return False
@@ -288,8 +672,10 @@ class BluettiMQTTService:
     def _log_config(self):
         """Log active configuration for easier debugging."""
         logging.debug(
-            "Bluetti MQTT config: host=%s interval=%ss timeout=%ss mac=%s adapter=%s device_name=%s",
+            "Bluetti MQTT config: mode=%s host=%s transport=%s interval=%ss timeout=%ss mac=%s adapter=%s device_name=%s",
+            self.mode,
             self.broker_host,
+            self.transport,
             self.broker_interval,
             self.broker_connection_timeout,
             self.mac_address,
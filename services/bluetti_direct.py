@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+from enum import Enum
+from typing import Callable, Collection, Dict, List, Optional
+
+import paho.mqtt.client as mqtt
+from bluetti_mqtt.bus import CommandMessage, EventBus, ParserMessage
+from bluetti_mqtt.core import BluettiDevice
+from bluetti_mqtt.core.devices.struct import BoolField, DecimalField, EnumField, UintField
+from bluetti_mqtt.device_handler import DeviceHandler
+
+# Struct field types bluetti-mqtt publishes as plain state topics; arrays, strings and versions are not.
+STATE_FIELD_TYPES = (BoolField, EnumField, UintField, DecimalField)
+
+
+def format_payload(value) -> str:
+    """Format a parsed value the way bluetti-mqtt publishes it: ON/OFF, enum name, or number."""
+    if isinstance(value, bool):
+        return "ON" if value else "OFF"
+    if isinstance(value, Enum):
+        return value.name
+    return str(value)
+
+
+def state_fields(device: BluettiDevice) -> Dict[str, type]:
+    """Publishable fields of ``device`` and their struct field type, from its register map."""
+    fields = {}
+    for field in device.struct.fields:
+        if isinstance(field, STATE_FIELD_TYPES):
+            fields.setdefault(field.name, type(field))
+    return fields
+
+
+class BluettiDirectPoller:
+    """Poll a Bluetti device over BLE in-process, without the bluetti-mqtt subprocess or a broker.
+
+    Parsed fields are formatted exactly like bluetti-mqtt would publish them and
+    handed to ``on_state(topic, payload)``; ``fields`` limits that to the names the
+    caller understands. When ``publish_host`` is set, the same topics are also
+    published to that broker with a paho client as a side output.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        interval: int,
+        on_state: Callable[[str, str], None],
+        publish_host: Optional[str] = None,
+        fields: Optional[Collection[str]] = None,
+    ):
+        self.address = address
+        self.interval = interval
+        self.on_state = on_state
+        self.publish_host = publish_host
+        self.fields = fields
+        self.bus: Optional[EventBus] = None
+        self.handler: Optional[DeviceHandler] = None
+        self.mqtt_client: Optional[mqtt.Client] = None
+        self._tasks: List[asyncio.Task] = []
+        # Device type -> {field name: struct field type}, built on the first parsed message.
+        self._state_fields: Dict[str, Dict[str, type]] = {}
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self):
+        if self.running:
+            return
+        self.bus = EventBus()
+        self.bus.add_parser_listener(self._handle_parsed)
+        self.handler = DeviceHandler([self.address], self.interval, self.bus)
+        self._tasks = [
+            asyncio.create_task(self.bus.run()),
+            asyncio.create_task(self.handler.run()),
+        ]
+        if self.publish_host:
+            self.mqtt_client = mqtt.Client()
+            # connect_async + loop_start: paho retries in its own thread, so a missing broker never blocks polling.
+            self.mqtt_client.connect_async(self.publish_host, 1883, keepalive=60)
+            self.mqtt_client.loop_start()
+        logging.info(
+            "Bluetti direct poller started for %s (interval=%ss, mqtt side output=%s)",
+            self.address,
+            self.interval,
+            self.publish_host or "off",
+        )
+
+    def stop(self):
+        """Cancel polling; the BLE client disconnects as its task unwinds."""
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
+        self._tasks = []
+        if self.mqtt_client is not None:
+            self.mqtt_client.loop_stop()
+            self.mqtt_client.disconnect()
+            self.mqtt_client = None
+        self.handler = None
+        self.bus = None
+        logging.debug("Bluetti direct poller stopped.")
+
+    async def command(self, field: str, payload: str) -> bool:
+        """Send a setter command using the same payload format as bluetti/command topics."""
+        device = self.handler.devices.get(self.address) if self.handler else None
+        if device is None or not device.has_field_setter(field):
+            logging.error(f"Cannot send direct command {field}={payload}: device not ready or field not settable.")
+            return False
+        field_type = state_fields(device).get(field)
+        if field_type is None:
+            logging.error(f"Cannot send direct command for unhandled field {field}.")
+            return False
+        if field_type is BoolField:
+            value = payload == "ON"
+        elif field_type is EnumField:
+            value = payload
+        else:
+            value = int(payload)
+        await self.bus.put(CommandMessage(device, device.build_setter_command(field, value)))
+        return True
+
+    async def _handle_parsed(self, msg: ParserMessage):
+        topic_prefix = f"bluetti/state/{msg.device.type}-{msg.device.sn}/"
+        fields = self._state_fields.get(msg.device.type)
+        if fields is None:
+            fields = self._state_fields[msg.device.type] = state_fields(msg.device)
+        for name, value in msg.parsed.items():
+            if name not in fields or (self.fields is not None and name not in self.fields):
+                continue
+            self._emit(topic_prefix + name, format_payload(value))
+
+        # Battery pack polls come back as loose fields; bundle them like bluetti-mqtt does.
+        pack_details = build_pack_details(msg.parsed)
+        if "pack_num" in msg.parsed and pack_details:
+            self._emit(
+                topic_prefix + f"pack_details{msg.parsed['pack_num']}",
+                json.dumps(pack_details, separators=(",", ":")),
+            )
+
+    def _emit(self, topic: str, payload: str):
+        self.on_state(topic, payload)
+        if self.mqtt_client is not None:
+            self.mqtt_client.publish(topic, payload)
+
+
+def build_pack_details(parsed: dict) -> dict:
+    """Mirror bluetti-mqtt's pack_details payload: status, percent, voltage and cell voltages."""
+    details = {}
+    if "pack_status" in parsed:
+        details["status"] = parsed["pack_status"].name
+    if "pack_battery_percent" in parsed:
+        details["percent"] = parsed["pack_battery_percent"]
+    if "pack_voltage" in parsed:
+        details["voltage"] = float(parsed["pack_voltage"])
+    if "cell_voltages" in parsed:
+        details["voltages"] = [float(v) for v in parsed["cell_voltages"]]
+    return details
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+
+from services.bluettiMqtt import BluettiMQTTService
+
+
+class BluettiLinkSupervisor:
+    """Keep the Bluetti BLE link (and broker) warm and reconnect it in the background.
+
+    A health check runs every ``health_interval_sec``: the link is healthy while
+    state messages keep arriving within ``stale_after_sec``. When it is not, the
+    client/broker are torn down and ``BluettiMQTTService.connect()`` runs again
+    until it succeeds. ``ready`` is set whenever a healthy link is available.
+    """
+
+    def __init__(self, service: BluettiMQTTService):
+        self.service = service
+        self.health_interval_sec = max(int(os.getenv("BLUETTI_HEALTH_INTERVAL_SEC", "30")), 1)
+        stale_after = os.getenv("BLUETTI_STALE_AFTER_SEC")
+        self._stale_after_sec: int | None = max(int(stale_after), 1) if stale_after else None
+        self.reconnect_delay_sec = max(int(os.getenv("BLUETTI_RECONNECT_DELAY_SEC", "30")), 1)
+        self.ready = asyncio.Event()
+        self._wake = asyncio.Event()
+        self.reconnects = 0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def stale_after_sec(self) -> int:
+        """Explicit BLUETTI_STALE_AFTER_SEC, else four poll intervals (at least 120s) at the running cadence."""
+        if self._stale_after_sec is not None:
+            return self._stale_after_sec
+        return max(int(self.service.live_interval or 30) * 4, 120)
+
+    @stale_after_sec.setter
+    def stale_after_sec(self, value: int):
+        self._stale_after_sec = value
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+        logging.info("Bluetti: Hot-standby link supervisor started.")
+
+    def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self.ready.clear()
+
+    def wake(self):
+        """Re-run the health check now instead of at the next interval (e.g. broker exited)."""
+        self.ready.clear()
+        self._wake.set()
+
+    def is_healthy(self) -> bool:
+        if not self.service.device_connected:
+            return False
+        age = self.service.seconds_since_last_message()
+        return age is not None and age < self.stale_after_sec
+
+    async def wait_ready(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _run(self):
+        while True:
+            try:
+                if self.is_healthy():
+                    self.ready.set()
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=self.health_interval_sec)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wake.clear()
+                    continue
+
+                self.ready.clear()
+                if self.service.last_message_at is not None:
+                    logging.warning(
+                        "Bluetti: Link unhealthy (connected=%s, last message %.0fs ago); reconnecting in background.",
+                        self.service.device_connected,
+                        self.service.seconds_since_last_message(),
+                    )
+                    self.service.stop_client()
+                    await self.service.stop_broker()
+                self.reconnects += 1
+                if await self.service.connect():
+                    logging.info("Bluetti: Hot-standby link ready.")
+                    self.ready.set()
+                    continue
+                await asyncio.sleep(self.reconnect_delay_sec)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.warning("Bluetti: Link supervisor iteration failed", exc_info=True)
+                await asyncio.sleep(self.reconnect_delay_sec)
@@ -1,22 +1,12 @@
-import asyncio
 import json
 import logging
 import os
-import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, time as dtime
 from typing import Optional, Tuple
 
-from services.tapo import TapoService
-
-
-# Lightweight clock wrapper to ease testing.
-class Clock:
-    def now(self) -> datetime:
-        return datetime.now()
-
-    def monotonic(self) -> float:
-        return time.monotonic()
+from services.tapo import TapoService, TapoUnreachableError
+from utils.clock import Clock
 
 
 def _parse_time(val: str, default: str) -> dtime:
@@ -196,14 +186,18 @@ class BoilerScheduler:
             self.logger.info("Boiler: Turned socket OFF")
         except Exception as exc:
             message = str(exc)
-            if any(token in message for token in ("No route to host", "HostUnreachable", "ConnectError")):
+            if isinstance(exc, TapoUnreachableError) or any(
+                token in message for token in ("No route to host", "HostUnreachable", "ConnectError")
+            ):
                 self.logger.warning("Boiler: Failed to turn off socket (device unreachable)")
             else:
                 self.logger.warning("Boiler: Failed to turn off socket", exc_info=True)
 
     async def _is_online(self) -> bool:
         try:
-            await self.tapo.initialize()
+            if not await self.tapo.probe():
+                return False
+            await self.tapo.initialize(probe=False)
             await self.tapo.get_state()
             return True
         except Exception:
@@ -267,17 +261,21 @@ class BoilerScheduler:
         if not online:
             prev = self.state
             self.state = BoilerState.WAITING_POWER if prev == BoilerState.WAITING_WINDOW else BoilerState.PAUSED
+            # Back off with the plug's circuit breaker instead of retrying every poll_sec forever.
+            retry_in = max(self.config.poll_sec, self.tapo.breaker.retry_in())
+            retry_in = min(retry_in, max((end - now).total_seconds(), 1))
             if prev != self.state:
                 self.logger.info("Boiler: State transition %s -> %s (waiting for power)", prev, self.state)
             else:
                 self.logger.info(
-                    "Boiler: Still waiting for power/online socket; retry in %ss (remaining %.0fs)",
-                    self.config.poll_sec,
+                    "Boiler: Still waiting for power/online socket; retry in %.0fs (remaining %.0fs, circuit %s)",
+                    retry_in,
                     self.remaining_sec,
+                    self.tapo.breaker.state,
                 )
             self.last_update_monotonic = now_mono  # avoid counting offline time as runtime
             self._persist_state(now)
-            return self.config.poll_sec
+            return retry_in
 
         # Ensure socket on
         self.logger.info("Boiler: Reconnecting socket before turn ON")
@@ -336,4 +334,4 @@ class BoilerScheduler:
             except Exception:
                 self.logger.warning("Boiler: Unexpected error in tick", exc_info=True)
                 sleep_for = self.config.poll_sec
-            await asyncio.sleep(max(sleep_for, 1))
+            await self.clock.sleep(max(sleep_for, 1))
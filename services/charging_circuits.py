@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from charging_state_handler import ChargingStateHandler
+from controllers.tapo import TapoController
+from services.charging_supervisor import ChargingConfig
+from services.grid_presence import GridPresence
+from services.tapo_manager import get_tapo_manager
+from utils.clock import Clock
+from utils.persistence import write_json_atomic
+
+
+def circuit_env_prefix(name: str) -> str:
+    """Env prefix for a circuit's overrides, e.g. ``pack-b`` -> ``CIRCUIT_PACK_B_``."""
+    return f"CIRCUIT_{re.sub(r'[^A-Z0-9]+', '_', name.upper())}_"
+
+
+@dataclass
+class CircuitConfig:
+    name: str
+    config: ChargingConfig
+    ip_address: Optional[str] = None
+    username: Optional[str] = None
+    password: Optional[str] = None
+    controls_bluetti: bool = False
+    state_file: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, name: str, controls_bluetti_default: bool = False) -> "CircuitConfig":
+        prefix = circuit_env_prefix(name)
+        controls_bluetti = os.getenv(f"{prefix}CONTROLS_BLUETTI")
+        return cls(
+            name=name,
+            config=ChargingConfig.from_env(prefix),
+            ip_address=os.getenv(f"{prefix}TAPO_IP_ADDRESS"),
+            username=os.getenv(f"{prefix}TAPO_USERNAME"),
+            password=os.getenv(f"{prefix}TAPO_PASSWORD"),
+            controls_bluetti=controls_bluetti_default
+            if controls_bluetti is None
+            else controls_bluetti.strip().lower() in {"1", "true", "yes", "y", "on"},
+            state_file=os.getenv(f"{prefix}STATE_FILE", f"logs/charging_state_{name}.json"),
+        )
+
+
+def load_circuits() -> List[CircuitConfig]:
+    """Circuits listed in ``CHARGING_CIRCUITS`` (comma separated); empty means the single default circuit.
+
+    The first circuit drives the Bluetti AC output unless some circuit sets
+    ``CIRCUIT_<NAME>_CONTROLS_BLUETTI`` explicitly.
+    """
+    names = [name.strip() for name in os.getenv("CHARGING_CIRCUITS", "").split(",") if name.strip()]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate charging circuit names: {names}")
+    circuits = [CircuitConfig.from_env(name) for name in names]
+    explicit = any(os.getenv(f"{circuit_env_prefix(name)}CONTROLS_BLUETTI") is not None for name in names)
+    if circuits and not explicit:
+        circuits[0].controls_bluetti = True
+    if sum(circuit.controls_bluetti for circuit in circuits) > 1:
+        raise ValueError("Only one charging circuit may control the Bluetti AC output")
+    return circuits
+
+
+class ChargingCircuits:
+    """Run one ChargingStateHandler per charging socket as concurrent tasks on one loop.
+
+    Circuits share the Tapo client manager (one login per account) and the Bluetti
+    controller. Status of all circuits is available from ``get_status()`` and is
+    written to ``status_file`` after every state step.
+    """
+
+    restart_delay_sec = 30.0
+
+    def __init__(
+        self,
+        handlers: List[ChargingStateHandler],
+        status_file: Optional[str] = None,
+        clock: Optional[Clock] = None,
+        grid: Optional[GridPresence] = None,
+    ):
+        self.handlers: Dict[str, ChargingStateHandler] = {}
+        for handler in handlers:
+            key = handler.name or "main"
+            if key in self.handlers:
+                raise ValueError(f"Duplicate charging circuit {key}")
+            self.handlers[key] = handler
+            handler.on_step = self._on_step
+        self.clock = clock or Clock()
+        self.status_file = os.getenv("CHARGING_STATUS_FILE", "logs/charging_status.json") if status_file is None else status_file
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.grid = grid
+
+    @classmethod
+    def from_env(cls, bluetti_controller, default_tapo_controller=None) -> "ChargingCircuits":
+        """Build handlers from ``load_circuits()``; without circuits, keep the single-socket setup."""
+        circuits = load_circuits()
+        if not circuits:
+            tapo_controller = default_tapo_controller or TapoController(get_tapo_manager().service())
+            return cls([ChargingStateHandler(tapo_controller, bluetti_controller)])
+
+        manager = get_tapo_manager()
+        handlers = []
+        sockets = set()
+        # One detector for all circuits: every plug is grid evidence, the Bluetti input is shared.
+        grid = GridPresence(bluetti_controller)
+        for circuit in circuits:
+            tapo = TapoController(
+                manager.service(ip_address=circuit.ip_address, username=circuit.username, password=circuit.password)
+            )
+            if tapo.tapo.ip_address in sockets:
+                raise ValueError(f"Charging circuit {circuit.name} shares socket {tapo.tapo.ip_address} with another circuit")
+            sockets.add(tapo.tapo.ip_address)
+            grid.probes.append(tapo.probe)
+            handlers.append(
+                ChargingStateHandler(
+                    tapo,
+                    bluetti_controller,
+                    config=circuit.config,
+                    state_file=circuit.state_file,
+                    name=circuit.name,
+                    controls_bluetti=circuit.controls_bluetti,
+                    grid=grid,
+                )
+            )
+            logging.info(
+                "Charging: Circuit %s on %s (controls Bluetti: %s)",
+                circuit.name,
+                tapo.tapo.ip_address,
+                circuit.controls_bluetti,
+            )
+        return cls(handlers, grid=grid)
+
+    def get_status(self) -> dict:
+        return {name: handler.get_status() for name, handler in self.handlers.items()}
+
+    def _on_step(self, handler: ChargingStateHandler):
+        if not self.status_file:
+            return
+        try:
+            write_json_atomic(self.status_file, {"updated_at": self.clock.now().isoformat(), "circuits": self.get_status()})
+        except OSError:
+            logging.warning("Charging: Failed to write circuit status to %s", self.status_file, exc_info=True)
+
+    async def _run_circuit(self, handler: ChargingStateHandler):
+        """Keep one circuit running; a crash restarts it without touching the other circuits."""
+        while True:
+            try:
+                await handler.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                handler.log.error("Circuit crashed; restarting in %.0fs", self.restart_delay_sec, exc_info=True)
+                await self.clock.sleep(self.restart_delay_sec)
+
+    async def run(self):
+        self.tasks = {
+            name: asyncio.create_task(self._run_circuit(handler), name=f"charging-{name}")
+            for name, handler in self.handlers.items()
+        }
+        try:
+            await asyncio.gather(*self.tasks.values())
+        finally:
+            for task in self.tasks.values():
+                task.cancel()
+            if self.grid:
+                self.grid.stop()
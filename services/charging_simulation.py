@@ -0,0 +1,290 @@
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from charging_state_handler import ChargingStateHandler
+from services.charging_supervisor import ChargingConfig
+from utils.clock import VirtualClock
+
+
+@dataclass
+class Scenario:
+    """Scripted grid and battery behaviour for one simulation run (all times in seconds)."""
+
+    duration_sec: float
+    # (start, end) windows without grid, relative to the start of the run
+    outages: List[Tuple[float, float]] = field(default_factory=list)
+    start_soc: float = 50.0
+    capacity_wh: float = 3000.0
+    charger_w: float = 500.0
+    # Above this SOC the charger draw tapers linearly down to idle_w at 100%.
+    taper_start_soc: float = 90.0
+    idle_w: float = 3.0
+    # Charger draw below this counts as "charge finished" for the end-of-charge metric.
+    charge_done_w: float = 20.0
+    ac_load_w: float = 0.0
+    bluetti_poll_sec: float = 30.0
+
+    @classmethod
+    def daily_outages(cls, days: int, start_hour: float, hours: float, **kwargs) -> "Scenario":
+        outages = [
+            (day * 86400 + start_hour * 3600, day * 86400 + (start_hour + hours) * 3600) for day in range(days)
+        ]
+        return cls(duration_sec=days * 86400, outages=outages, **kwargs)
+
+
+class SimWorld:
+    """Grid, charger socket and battery physics advanced on the virtual clock."""
+
+    def __init__(self, scenario: Scenario, clock: VirtualClock):
+        self.scenario = scenario
+        self.clock = clock
+        self.soc = scenario.start_soc
+        self.socket_on = False
+        self.ac_on = False
+        self.socket_cycles = 0
+        self.socket_on_sec = 0.0
+        self.ac_on_sec = 0.0
+        self.full_since: Optional[float] = None
+        self.end_of_charge_delays: List[float] = []
+        # Reaction times: outage start -> Bluetti AC on, outage end -> charger socket on.
+        self.outage_reaction_delays: Dict[int, float] = {}
+        self.restore_reaction_delays: Dict[int, float] = {}
+        self._last_update = clock.monotonic()
+
+    def grid(self, t: Optional[float] = None) -> bool:
+        t = self.clock.monotonic() if t is None else t
+        return not any(start <= t < end for start, end in self.scenario.outages)
+
+    def _latest_outage(self, edge: int) -> Optional[int]:
+        """Index of the most recent outage whose start (edge 0) or end (edge 1) has passed."""
+        now = self.clock.monotonic()
+        passed = [idx for idx, outage in enumerate(self.scenario.outages) if outage[edge] <= now]
+        return passed[-1] if passed else None
+
+    def charge_power(self) -> float:
+        """Charger draw through the socket at the current SOC (0 when unpowered)."""
+        if not (self.socket_on and self.grid()):
+            return 0.0
+        scenario = self.scenario
+        if self.soc < scenario.taper_start_soc:
+            return scenario.charger_w
+        span = max(100.0 - scenario.taper_start_soc, 1e-9)
+        fraction = max(100.0 - self.soc, 0.0) / span
+        return scenario.idle_w + (scenario.charger_w - scenario.idle_w) * fraction
+
+    def ac_output_power(self) -> float:
+        return self.scenario.ac_load_w if self.ac_on else 0.0
+
+    def update(self):
+        now = self.clock.monotonic()
+        dt = now - self._last_update
+        self._last_update = now
+        if dt <= 0:
+            return
+        capacity = self.scenario.capacity_wh
+        self.soc += (self.charge_power() - self.ac_output_power()) * dt / 3600 / capacity * 100
+        self.soc = min(max(self.soc, 0.0), 100.0)
+        if self.socket_on:
+            self.socket_on_sec += dt
+        if self.ac_on:
+            self.ac_on_sec += dt
+        # End of charge: socket still on while the charger has tapered below charge_done_w.
+        if self.socket_on and self.grid() and self.charge_power() < self.scenario.charge_done_w:
+            if self.full_since is None:
+                self.full_since = now
+        else:
+            self.full_since = None
+
+    def set_socket(self, on: bool):
+        self.update()
+        if on and not self.socket_on:
+            self.socket_cycles += 1
+            restored = self._latest_outage(1)
+            if restored is not None and restored not in self.restore_reaction_delays:
+                self.restore_reaction_delays[restored] = self.clock.monotonic() - self.scenario.outages[restored][1]
+        if not on and self.socket_on and self.full_since is not None:
+            self.end_of_charge_delays.append(self.clock.monotonic() - self.full_since)
+            self.full_since = None
+        self.socket_on = on
+
+    def set_ac(self, on: bool):
+        self.update()
+        if on and not self.grid():
+            started = self._latest_outage(0)
+            if started is not None and started not in self.outage_reaction_delays:
+                self.outage_reaction_delays[started] = self.clock.monotonic() - self.scenario.outages[started][0]
+        self.ac_on = on
+
+
+class _SimTapoStatus:
+    def __init__(self, world: SimWorld):
+        self.world = world
+        self.online = False
+
+    def get_status(self) -> dict:
+        return {"online": self.online}
+
+
+class SimTapoController:
+    """Charger plug: unreachable while the grid is down, reports the charger draw otherwise."""
+
+    def __init__(self, world: SimWorld):
+        self.world = world
+        self.status = _SimTapoStatus(world)
+
+    def _require_grid(self):
+        if not self.world.grid():
+            raise ConnectionError("simulated plug offline")
+
+    async def initialize(self):
+        self._require_grid()
+
+    async def get_status(self):
+        self.status.online = self.world.grid()
+
+    async def probe(self) -> bool:
+        return self.world.grid()
+
+    def reset_backoff(self):
+        pass
+
+    def circuit_status(self) -> dict:
+        return {"state": "closed", "retry_in_sec": 0}
+
+    async def start_charging(self):
+        self._require_grid()
+        self.world.set_socket(True)
+
+    async def stop_charging(self):
+        self._require_grid()
+        self.world.set_socket(False)
+
+    async def get_current_power(self, max_age=None):
+        self._require_grid()
+        self.world.update()
+        return round(self.world.charge_power(), 1)
+
+
+class SimBluettiController:
+    """Power station: publishes readings every poll interval and follows AC commands immediately."""
+
+    def __init__(self, world: SimWorld):
+        self.world = world
+        self.readings = {"ac_input_power": 0.0, "ac_output_on": False, "ac_output_power": 0.0}
+        self._updated = asyncio.Event()
+        self._zero_draw_since: Optional[float] = None
+
+    async def initialize(self):
+        pass
+
+    def set_poll_profile(self, profile: str) -> bool:
+        return True
+
+    async def turn_ac(self, state: str, confirm: bool = False, timeout: float | None = None) -> bool:
+        self.world.set_ac(state == "ON")
+        self.publish()
+        return True
+
+    def get_status(self) -> dict:
+        return dict(self.readings)
+
+    def ac_zero_draw_since(self) -> Optional[float]:
+        return self._zero_draw_since
+
+    async def wait_for_update(self, fields, timeout: float | None = None) -> bool:
+        try:
+            await asyncio.wait_for(self._updated.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def publish(self):
+        world = self.world
+        now = world.clock.monotonic()
+        self.readings = {
+            "ac_input_power": world.charge_power(),
+            "ac_output_on": world.ac_on,
+            "ac_output_power": world.ac_output_power(),
+        }
+        if world.ac_on and world.ac_output_power() <= 0:
+            if self._zero_draw_since is None:
+                self._zero_draw_since = now
+        else:
+            self._zero_draw_since = None
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    async def run(self):
+        while True:
+            self.world.update()
+            self.publish()
+            await self.world.clock.sleep(self.world.scenario.bluetti_poll_sec)
+
+
+def simulate(scenario: Scenario, config: Optional[ChargingConfig] = None) -> dict:
+    """Run ChargingStateHandler against simulated devices on a virtual clock and report the outcome."""
+    clock = VirtualClock()
+    world = SimWorld(scenario, clock)
+    tapo = SimTapoController(world)
+    bluetti = SimBluettiController(world)
+
+    async def _run():
+        handler = ChargingStateHandler(
+            tapo, bluetti, config=config or ChargingConfig.from_env(), clock=clock, state_file=""
+        )
+        ticker = asyncio.create_task(bluetti.run())
+        try:
+            await asyncio.wait_for(handler.run(), timeout=scenario.duration_sec)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            ticker.cancel()
+            if handler.offline_recovery_task:
+                handler.offline_recovery_task.cancel()
+        world.update()
+
+    clock.run(_run())
+    delays = world.end_of_charge_delays
+    outage_delays = list(world.outage_reaction_delays.values())
+    restore_delays = list(world.restore_reaction_delays.values())
+    return {
+        "simulated_sec": round(clock.monotonic()),
+        "socket_cycles": world.socket_cycles,
+        "socket_on_sec": round(world.socket_on_sec),
+        "ac_on_sec": round(world.ac_on_sec),
+        "end_of_charge_detections": len(delays),
+        "end_of_charge_delay_mean_sec": round(sum(delays) / len(delays)) if delays else None,
+        "end_of_charge_delay_max_sec": round(max(delays)) if delays else None,
+        "outage_reaction_mean_sec": round(sum(outage_delays) / len(outage_delays)) if outage_delays else None,
+        "outage_reaction_max_sec": round(max(outage_delays)) if outage_delays else None,
+        "restore_reaction_mean_sec": round(sum(restore_delays) / len(restore_delays)) if restore_delays else None,
+        "restore_reaction_max_sec": round(max(restore_delays)) if restore_delays else None,
+        "final_soc": round(world.soc, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate the charging state machine on a virtual clock.")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--outage-start-hour", type=float, default=18.0)
+    parser.add_argument("--outage-hours", type=float, default=4.0)
+    parser.add_argument("--start-soc", type=float, default=50.0)
+    parser.add_argument("--ac-load-w", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    scenario = Scenario.daily_outages(
+        args.days,
+        args.outage_start_hour,
+        args.outage_hours,
+        start_soc=args.start_soc,
+        ac_load_w=args.ac_load_w,
+    )
+    print(simulate(scenario))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,36 @@ import os
 from dataclasses import dataclass
 from typing import List
 
+from services.power_filter import HampelFilter
+from services.power_trend import PowerTrend
 
-def _int_env(name: str, default: int) -> int:
+
+def _env(name: str, prefix: str = "") -> str | None:
+    """Read ``<prefix><name>``, falling back to the unprefixed variable."""
+    if prefix:
+        value = os.getenv(f"{prefix}{name}")
+        if value is not None:
+            return value
+    return os.getenv(name)
+
+
+def _int_env(name: str, default: int, prefix: str = "") -> int:
     """Parse an int env var with a safe fallback."""
     try:
-        return int(os.getenv(name, default))
+        return int(_env(name, prefix) or default)
+    except (TypeError, ValueError):
+        return default
+
+
+def _float_env(name: str, default: float, prefix: str = "") -> float:
+    try:
+        return float(_env(name, prefix) or default)
     except (TypeError, ValueError):
         return default
 
 
-def _bool_env(name: str, default: bool) -> bool:
-    raw = os.getenv(name)
+def _bool_env(name: str, default: bool, prefix: str = "") -> bool:
+    raw = _env(name, prefix)
     if raw is None:
         return default
     return raw.strip().lower() in {"1", "true", "yes", "y", "on"}
@@ -32,28 +51,68 @@ class ChargingConfig:
     recheck_off_sec: int
     recheck_quick_checks: int
     recheck_quick_interval_sec: int
+    # Adaptive sampling: poll every check_interval_sec during bulk charge, down to
+    # sample_min_interval_sec once the trend says the charger is tapering off.
+    adaptive_sampling_enabled: bool = True
+    sample_min_interval_sec: int = 60
+    power_ewma_tau_sec: float = 300.0
+    power_trend_window: int = 4
+    # Hampel filter on Tapo readings: a window below 3 disables it.
+    power_filter_window: int = 5
+    power_filter_k: float = 3.0
+    power_filter_min_dev_w: float = 10.0
+    # Per-action bounds for device calls made by the state machine.
+    tapo_action_timeout_sec: float = 30.0
+    bluetti_action_timeout_sec: float = 120.0
 
     @classmethod
-    def from_env(cls) -> "ChargingConfig":
+    def from_env(cls, prefix: str = "") -> "ChargingConfig":
+        """Build the config from env; with ``prefix`` (e.g. ``CIRCUIT_PACKB_``) prefixed variables win."""
         return cls(
-            charging_w_threshold=_int_env("CHARGING_W_THRESHOLD", 20),
-            low_power_consecutive_count=_int_env("LOW_POWER_CONSECUTIVE_COUNT", 3),
-            check_interval_sec=_int_env("CHECK_INTERVAL_SEC", 900),
-            first_power_check_delay_sec=_int_env("FIRST_POWER_CHECK_DELAY_SEC", 30),
-            startup_grace_sec=_int_env("STARTUP_GRACE_SEC", 90),
-            min_on_time_sec=_int_env("MIN_ON_TIME_SEC", 1200),
-            stable_power_checks=_int_env("STABLE_POWER_CHECKS", 2),
-            stable_power_interval_sec=_int_env("STABLE_POWER_INTERVAL_SEC", 60),
-            recheck_cycle_enabled=_bool_env("RECHECK_CYCLE_ENABLED", True),
-            recheck_off_sec=_int_env("RECHECK_OFF_SEC", 90),
-            recheck_quick_checks=_int_env("RECHECK_QUICK_CHECKS", 3),
-            recheck_quick_interval_sec=_int_env("RECHECK_QUICK_INTERVAL_SEC", 20),
+            charging_w_threshold=_int_env("CHARGING_W_THRESHOLD", 20, prefix),
+            low_power_consecutive_count=_int_env("LOW_POWER_CONSECUTIVE_COUNT", 3, prefix),
+            check_interval_sec=_int_env("CHECK_INTERVAL_SEC", 900, prefix),
+            first_power_check_delay_sec=_int_env("FIRST_POWER_CHECK_DELAY_SEC", 30, prefix),
+            startup_grace_sec=_int_env("STARTUP_GRACE_SEC", 90, prefix),
+            min_on_time_sec=_int_env("MIN_ON_TIME_SEC", 1200, prefix),
+            stable_power_checks=_int_env("STABLE_POWER_CHECKS", 2, prefix),
+            stable_power_interval_sec=_int_env("STABLE_POWER_INTERVAL_SEC", 60, prefix),
+            recheck_cycle_enabled=_bool_env("RECHECK_CYCLE_ENABLED", True, prefix),
+            recheck_off_sec=_int_env("RECHECK_OFF_SEC", 90, prefix),
+            recheck_quick_checks=_int_env("RECHECK_QUICK_CHECKS", 3, prefix),
+            recheck_quick_interval_sec=_int_env("RECHECK_QUICK_INTERVAL_SEC", 20, prefix),
+            adaptive_sampling_enabled=_bool_env("ADAPTIVE_SAMPLING_ENABLED", True, prefix),
+            sample_min_interval_sec=_int_env("SAMPLE_MIN_INTERVAL_SEC", 60, prefix),
+            power_ewma_tau_sec=_float_env("POWER_EWMA_TAU_SEC", 300.0, prefix),
+            power_trend_window=_int_env("POWER_TREND_WINDOW", 4, prefix),
+            power_filter_window=_int_env("POWER_FILTER_WINDOW", 5, prefix),
+            power_filter_k=_float_env("POWER_FILTER_K", 3.0, prefix),
+            power_filter_min_dev_w=_float_env("POWER_FILTER_MIN_DEV_W", 10.0, prefix),
+            tapo_action_timeout_sec=_float_env("TAPO_ACTION_TIMEOUT_SEC", 30.0, prefix),
+            bluetti_action_timeout_sec=_float_env("BLUETTI_ACTION_TIMEOUT_SEC", 120.0, prefix),
         )
 
 
 class ChargingSupervisor:
     def __init__(self, config: ChargingConfig | None = None):
         self.config = config or ChargingConfig.from_env()
+        self.power_filter = HampelFilter(
+            self.config.power_filter_window,
+            self.config.power_filter_k,
+            self.config.power_filter_min_dev_w,
+        )
+
+    def filter_power(self, power_w: float | int | None) -> float | None:
+        """Feed a raw Tapo reading through the outlier filter and return the value to decide on."""
+        return self.power_filter.add(power_w)
+
+    def filter_stats(self) -> dict:
+        """Window statistics of the outlier filter for logging."""
+        return {"raw_w": self.power_filter.last_raw, **self.power_filter.stats()}
+
+    def reset_filter(self):
+        """Forget the window, e.g. after the socket was switched and the draw starts from a new level."""
+        self.power_filter.reset()
 
     def is_charging(self, power_w: float | int | None) -> bool:
         """Return True when the measured power is above the threshold."""
@@ -72,6 +131,26 @@ class ChargingSupervisor:
             and not self.is_charging(power_w)
         )
 
+    def next_check_interval(self, trend: PowerTrend, power_w: float | int | None) -> float:
+        """Seconds until the next power sample while charging.
+
+        Bulk charge (flat or rising draw) samples every ``check_interval_sec``. While
+        the trend is still being learned, or the draw is already low, it samples every
+        ``sample_min_interval_sec``. It also samples that fast right after the filter
+        rejected a reading, to confirm quickly whether the draw really changed. When the
+        draw is falling, it samples about twice before the predicted end of charge.
+        """
+        slow = float(self.config.check_interval_sec)
+        fast = float(min(self.config.sample_min_interval_sec, slow))
+        if not self.config.adaptive_sampling_enabled:
+            return slow
+        if not self.is_charging(power_w) or len(trend) < 3 or self.power_filter.last_rejected:
+            return fast
+        eta = trend.seconds_until(self.config.charging_w_threshold)
+        if eta is None:
+            return slow
+        return min(max(eta / 2, fast), slow)
+
     def recheck_confirms_charging(self, power_readings: List[float | int | None]) -> bool:
         """Return True if any quick recheck reading shows charging."""
         return any(self.is_charging(reading) for reading in power_readings)
@@ -0,0 +1,106 @@
+import logging
+import random
+import time
+from typing import Callable, Optional
+
+
+class CircuitState:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised when a call is refused because the device's circuit is open."""
+
+
+class CircuitBreaker:
+    """Per-device breaker: stop calling a dead device and back off exponentially.
+
+    After ``failure_threshold`` consecutive failures the circuit opens for a
+    jittered, exponentially growing backoff. Once it elapses the circuit goes
+    half-open and lets a trial call through; success closes it, failure
+    re-opens it with a longer backoff.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        base_backoff_sec: float = 5.0,
+        max_backoff_sec: float = 300.0,
+        jitter: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.base_backoff_sec = max(base_backoff_sec, 0.0)
+        self.max_backoff_sec = max(max_backoff_sec, self.base_backoff_sec)
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self._clock = clock
+        self._rng = rng
+
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.opened_until: Optional[float] = None
+
+    def allow_request(self) -> bool:
+        """Return True when a call to the device may proceed."""
+        if self.state == CircuitState.OPEN:
+            if self._clock() < self.opened_until:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            logging.info("Circuit %s: half-open; allowing a trial request", self.name)
+        return True
+
+    def record_success(self):
+        if self.state != CircuitState.CLOSED:
+            logging.info("Circuit %s: closed after successful request", self.name)
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.opened_until = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._trip()
+
+    def reset(self, reason: str):
+        """Close the circuit without a trial request, e.g. once the device is known to be reachable again."""
+        if self.state != CircuitState.CLOSED:
+            logging.info("Circuit %s: reset (%s)", self.name, reason)
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.opened_until = None
+
+    def retry_in(self) -> float:
+        """Seconds until the circuit lets a request through again (0 when closed/half-open)."""
+        if self.state != CircuitState.OPEN or self.opened_until is None:
+            return 0.0
+        return max(self.opened_until - self._clock(), 0.0)
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trips,
+            "retry_in_sec": round(self.retry_in(), 1),
+        }
+
+    def _trip(self):
+        self.trips += 1
+        backoff = min(self.base_backoff_sec * (2 ** (self.trips - 1)), self.max_backoff_sec)
+        backoff *= 1 + self.jitter * (2 * self._rng() - 1)
+        self.opened_until = self._clock() + backoff
+        self.state = CircuitState.OPEN
+        logging.info(
+            "Circuit %s: open after %s consecutive failures; next attempt in %.1fs",
+            self.name,
+            self.consecutive_failures,
+            backoff,
+        )
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.clock import Clock
+
+
+@dataclass
+class ActionResult:
+    """Outcome of one device action: ``ok`` unless it raised or ran out of time."""
+
+    name: str
+    ok: bool
+    value: Any = None
+    error: Optional[BaseException] = None
+    timed_out: bool = False
+    elapsed_sec: float = 0.0
+
+    def describe(self) -> str:
+        if self.timed_out:
+            outcome = "timed out"
+        elif not self.ok:
+            outcome = f"failed ({self.error!r})"
+        else:
+            outcome = "ok" if self.value is None else f"ok ({self.value!r})"
+        return f"{self.name} {outcome} in {self.elapsed_sec:.1f}s"
+
+
+@dataclass(frozen=True)
+class DeviceAction:
+    """A named device operation: ``run`` creates the coroutine, ``timeout`` bounds it (None = unbounded)."""
+
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    timeout: Optional[float] = None
+
+
+async def run_action(action: DeviceAction, clock: Optional[Clock] = None) -> ActionResult:
+    """Run one action under its timeout; exceptions are captured in the result instead of raised."""
+    clock = clock or Clock()
+    started = clock.monotonic()
+    try:
+        value = await asyncio.wait_for(action.run(), timeout=action.timeout)
+        return ActionResult(action.name, True, value=value, elapsed_sec=clock.monotonic() - started)
+    except asyncio.TimeoutError as exc:
+        return ActionResult(action.name, False, error=exc, timed_out=True, elapsed_sec=clock.monotonic() - started)
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        logging.debug("Device action %s failed", action.name, exc_info=True)
+        return ActionResult(action.name, False, error=exc, elapsed_sec=clock.monotonic() - started)
+
+
+async def run_actions(*actions: DeviceAction, clock: Optional[Clock] = None) -> Dict[str, ActionResult]:
+    """Run independent actions concurrently; total latency is the slowest action, not the sum."""
+    results = await asyncio.gather(*(run_action(action, clock) for action in actions))
+    return {result.name: result for result in results}
+
+
+def sequence(*steps: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+    """Chain dependent steps into one action (the value is the last step's value)."""
+
+    async def _run():
+        value = None
+        for step in steps:
+            value = await step()
+        return value
+
+    return _run
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from utils.clock import Clock
+
+GridListener = Callable[[bool, str], None]
+
+
+@dataclass
+class GridPresenceConfig:
+    # Hysteresis on Bluetti AC input: at or above on_w the grid is feeding it; at or below off_w it stopped.
+    input_on_w: float = 30.0
+    input_off_w: float = 5.0
+    # Debounce: a drop must last this long and be confirmed by a failed plug probe before grid-down.
+    down_confirm_sec: float = 20.0
+    # A plug that came back must still answer after this long before grid-up (outage flicker).
+    up_confirm_sec: float = 10.0
+    # While no input flows (socket off), probe the plugs this often; 0 disables periodic probes.
+    probe_interval_sec: float = 30.0
+    # Without a new input reading for this long, stop trusting "input flowing" (BLE link lost).
+    input_stale_sec: float = 180.0
+
+    @classmethod
+    def from_env(cls) -> "GridPresenceConfig":
+        return cls(
+            input_on_w=float(os.getenv("GRID_INPUT_ON_W", "30")),
+            input_off_w=float(os.getenv("GRID_INPUT_OFF_W", "5")),
+            down_confirm_sec=max(float(os.getenv("GRID_DOWN_CONFIRM_SEC", "20")), 0),
+            up_confirm_sec=max(float(os.getenv("GRID_UP_CONFIRM_SEC", "10")), 0),
+            probe_interval_sec=max(float(os.getenv("GRID_PROBE_INTERVAL_SEC", "30")), 0),
+            input_stale_sec=max(float(os.getenv("GRID_INPUT_STALE_SEC", "180")), 1),
+        )
+
+
+class GridPresence:
+    """Grid-up/grid-down detector fusing Bluetti AC input with Tapo plug reachability.
+
+    Bluetti input at or above ``input_on_w`` proves the grid is up and is acted on
+    at once. A drop to ``input_off_w`` or below may only mean the charger socket was
+    switched off or the charge finished. So grid-down needs the drop to persist for
+    ``down_confirm_sec`` and every plug probe to fail. Plug reachability reported by
+    the state machine, or probed here while no input flows, works the same way in
+    both directions. Listeners are called with ``(present, reason)`` on confirmed
+    transitions only; the first determination just sets ``present``.
+    """
+
+    def __init__(
+        self,
+        bluetti_controller,
+        probes: Optional[List[Callable[[], Awaitable[bool]]]] = None,
+        config: Optional[GridPresenceConfig] = None,
+        clock: Optional[Clock] = None,
+    ):
+        self.bluetti_controller = bluetti_controller
+        self.probes = list(probes or [])
+        self.config = config or GridPresenceConfig.from_env()
+        self.clock = clock or Clock()
+        self.present: Optional[bool] = None
+        self.changed_at: Optional[float] = None
+        self.input_flowing = False
+        self.input_at: Optional[float] = None
+        self.listeners: List[GridListener] = []
+        self.task: Optional[asyncio.Task] = None
+        # (target presence, monotonic deadline, reason) awaiting confirmation
+        self._pending: Optional[Tuple[bool, float, str]] = None
+        self._next_probe_at = 0.0
+        self._wakeup = asyncio.Event()
+
+    def subscribe(self, listener: GridListener):
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def unsubscribe(self, listener: GridListener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def start(self) -> asyncio.Task:
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return self.task
+
+    def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+        self.task = None
+
+    def get_status(self) -> dict:
+        pending = self._pending
+        return {
+            "present": self.present,
+            "input_flowing": self.input_flowing,
+            "pending": None if pending is None else ("up" if pending[0] else "down"),
+        }
+
+    def observe_input(self, power):
+        """Feed one Bluetti ``ac_input_power`` reading."""
+        try:
+            power = float(power)
+        except (TypeError, ValueError):
+            return
+        self.input_at = self.clock.monotonic()
+        if power >= self.config.input_on_w:
+            self.input_flowing = True
+            self._pending = None
+            self._set(True, f"Bluetti AC input {power:.0f}W")
+        elif power <= self.config.input_off_w:
+            was_flowing, self.input_flowing = self.input_flowing, False
+            if self.present is None or (was_flowing and self.present):
+                self._expect(False, f"Bluetti AC input dropped to {power:.0f}W", self.config.down_confirm_sec)
+
+    def report_reachable(self, reachable: bool):
+        """Feed a plug reachability observation (e.g. from the charging wait state)."""
+        if reachable:
+            if self._pending is not None and not self._pending[0]:
+                self._pending = None
+            if self.present is not True:
+                self._expect(True, "Tapo plug reachable", self.config.up_confirm_sec)
+        elif not self.input_flowing:
+            if self._pending is not None and self._pending[0]:
+                self._pending = None
+            if self.present is not False:
+                self._expect(False, "Tapo plug unreachable", self.config.down_confirm_sec)
+
+    def _expect(self, present: bool, reason: str, delay: float):
+        if self._pending is not None and self._pending[0] == present:
+            return
+        self._pending = (present, self.clock.monotonic() + delay, reason)
+        self._wakeup.set()
+
+    async def probe(self) -> Optional[bool]:
+        """True if any plug answers, False if none does, None without probes."""
+        if not self.probes:
+            return None
+        results = await asyncio.gather(*(probe() for probe in self.probes), return_exceptions=True)
+        return any(result is True for result in results)
+
+    async def _confirm(self):
+        present, _, reason = self._pending
+        self._pending = None
+        up = self.input_flowing or bool(await self.probe())
+        if up:
+            self._set(True, reason if present else "Tapo plug reachable")
+        elif not present:
+            self._set(False, reason)
+        else:
+            logging.info("Grid: %s but not confirmed; ignoring", reason)
+
+    def _set(self, present: bool, reason: str):
+        if self.present == present:
+            return
+        previous, self.present = self.present, present
+        self.changed_at = self.clock.monotonic()
+        if previous is None:
+            logging.info("Grid: initially %s (%s)", "up" if present else "down", reason)
+            return
+        logging.info("Grid: %s (%s)", "UP" if present else "DOWN", reason)
+        for listener in list(self.listeners):
+            try:
+                listener(present, reason)
+            except Exception:
+                logging.warning("Grid: listener failed", exc_info=True)
+
+    def _next_deadline(self, now: float) -> Optional[float]:
+        deadlines = []
+        if self._pending is not None:
+            deadlines.append(self._pending[1])
+        if self.probes and self.config.probe_interval_sec > 0 and not self.input_flowing:
+            deadlines.append(self._next_probe_at)
+        if self.input_flowing and self.input_at is not None:
+            deadlines.append(self.input_at + self.config.input_stale_sec)
+        return max(min(deadlines) - now, 0.0) if deadlines else None
+
+    async def _wait(self, timeout: Optional[float]) -> bool:
+        """Wait for a Bluetti input reading; an ``_expect`` call or the timeout also ends the wait."""
+        update = asyncio.ensure_future(self.bluetti_controller.wait_for_update(("ac_input_power",), timeout))
+        wakeup = asyncio.ensure_future(self._wakeup.wait())
+        try:
+            await asyncio.wait((update, wakeup), return_when=asyncio.FIRST_COMPLETED)
+            return update.done() and not update.cancelled() and update.result() is True
+        finally:
+            update.cancel()
+            wakeup.cancel()
+            self._wakeup.clear()
+
+    async def run(self):
+        while True:
+            try:
+                if await self._wait(self._next_deadline(self.clock.monotonic())):
+                    self.observe_input(self.bluetti_controller.get_status().get("ac_input_power"))
+                now = self.clock.monotonic()
+                if self.input_flowing and now - (self.input_at or now) >= self.config.input_stale_sec:
+                    logging.info("Grid: no Bluetti AC input reading for %.0fs; falling back to plug probes", now - self.input_at)
+                    self.input_flowing = False
+                if self._pending is not None and self._pending[1] <= now:
+                    await self._confirm()
+                if (
+                    self.probes
+                    and self.config.probe_interval_sec > 0
+                    and not self.input_flowing
+                    and self._next_probe_at <= now
+                ):
+                    self._next_probe_at = now + self.config.probe_interval_sec
+                    self.report_reachable(bool(await self.probe()))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.warning("Grid: detector iteration failed", exc_info=True)
+                await self.clock.sleep(self.config.down_confirm_sec or 1.0)
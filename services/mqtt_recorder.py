@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import inspect
+import logging
+import os
+import struct
+import time
+from typing import Awaitable, Callable, Iterable, Iterator, Optional, Tuple, Union
+
+from asyncio_mqtt import Client as AsyncMqttClient
+
+MAGIC = b"BQMQ\x01"
+# seconds since the recording session started, topic length, payload length
+RECORD_HEADER = struct.Struct("<dHI")
+# Replay never waits longer than this between two messages (a gap in the capture, e.g. a BLE drop).
+DEFAULT_MAX_GAP_SEC = 300.0
+
+Record = Tuple[float, str, str]
+Sink = Callable[[str, str], Union[None, Awaitable[None]]]
+
+
+class MqttRecorder:
+    """Append (ts, topic, payload) records to a compact binary file.
+
+    The file starts with ``MAGIC`` followed by fixed-size headers and raw UTF-8
+    bytes, so recording costs one small write per message and a file survives
+    restarts (new records are appended). ``ts`` counts seconds from this
+    recorder's first message, so each process run appends a session starting
+    at 0 instead of raw monotonic times that jump across restarts and reboots.
+    """
+
+    def __init__(self, path: str, flush_every: int = 50):
+        self.path = path
+        self.flush_every = max(flush_every, 1)
+        self.records = 0
+        self._file = None
+        self._session_start: Optional[float] = None
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+    def record(self, topic: str, payload: str, ts: Optional[float] = None):
+        if self._file is None:
+            self._open()
+        ts = time.monotonic() if ts is None else ts
+        if self._session_start is None:
+            self._session_start = ts
+        topic_bytes = topic.encode()
+        payload_bytes = payload.encode()
+        self._file.write(RECORD_HEADER.pack(ts - self._session_start, len(topic_bytes), len(payload_bytes)))
+        self._file.write(topic_bytes)
+        self._file.write(payload_bytes)
+        self.records += 1
+        if self.records % self.flush_every == 0:
+            self._file.flush()
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_recording(path: str) -> Iterator[Record]:
+    """Yield records in file order; a truncated trailing record (crash mid-write) is dropped."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an MQTT recording")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            ts, topic_len, payload_len = RECORD_HEADER.unpack(header)
+            body = f.read(topic_len + payload_len)
+            if len(body) < topic_len + payload_len:
+                logging.warning("Recording %s ends with a truncated record; ignoring it.", path)
+                return
+            yield ts, body[:topic_len].decode(), body[topic_len:].decode()
+
+
+async def replay(
+    records: Iterable[Record], sink: Sink, speed: float = 1.0, max_gap: float = DEFAULT_MAX_GAP_SEC
+) -> int:
+    """Feed records to ``sink(topic, payload)`` keeping their spacing divided by ``speed``.
+
+    Gaps are clamped to ``0..max_gap`` seconds, so a new session (times restart
+    at 0) or a long pause in the capture does not stall the replay. ``speed <= 0``
+    replays as fast as possible, yielding to the loop every 100 messages.
+    ``sink`` may be a plain function or a coroutine function.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    previous_ts = None
+    offset = 0.0
+    count = 0
+    for ts, topic, payload in records:
+        if previous_ts is not None:
+            offset += min(max(ts - previous_ts, 0.0), max_gap)
+        previous_ts = ts
+        if speed > 0:
+            delay = started + offset / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif count % 100 == 0:
+            await asyncio.sleep(0)
+        result = sink(topic, payload)
+        if inspect.isawaitable(result):
+            await result
+        count += 1
+    return count
+
+
+async def record_broker(host: str, path: str, topic: str = "bluetti/state/#", duration: Optional[float] = None) -> int:
+    """Record everything on ``topic`` from the broker at ``host`` until cancelled or ``duration`` elapses."""
+    recorder = MqttRecorder(path)
+
+    async def _consume(client):
+        async with client.filtered_messages(topic) as messages:
+            await client.subscribe(topic)
+            async for message in messages:
+                recorder.record(message.topic, message.payload.decode())
+
+    try:
+        async with AsyncMqttClient(host, 1883, keepalive=60) as client:
+            try:
+                await asyncio.wait_for(_consume(client), timeout=duration)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        recorder.close()
+    return recorder.records
+
+
+async def replay_to_broker(path: str, host: str, speed: float = 1.0, max_gap: float = DEFAULT_MAX_GAP_SEC) -> int:
+    async with AsyncMqttClient(host, 1883, keepalive=60) as client:
+        return await replay(read_recording(path), client.publish, speed, max_gap)
+
+
+async def replay_to_service(path: str, speed: float = 0, max_gap: float = DEFAULT_MAX_GAP_SEC) -> dict:
+    """Replay into a fresh BluettiMQTTService (no broker or BLE needed) and report ingest throughput."""
+    from services.bluettiMqtt import BluettiMQTTService
+
+    service = BluettiMQTTService()
+    service.status_file = ""
+    service.recorder = None
+    started = time.perf_counter()
+    count = await replay(read_recording(path), service.handle_state, speed, max_gap)
+    elapsed = time.perf_counter() - started
+    return {
+        "messages": count,
+        "elapsed_sec": round(elapsed, 3),
+        "messages_per_sec": round(count / elapsed) if elapsed > 0 else None,
+        "unknown_topics": dict(service.unknown_topics),
+        "status": service.status.get_status(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and replay bluetti/state MQTT traffic.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_cmd = commands.add_parser("record", help="record bluetti/state/# from a broker")
+    record_cmd.add_argument("path")
+    record_cmd.add_argument("--broker", default=os.getenv("BLUETTI_BROKER_HOST", "localhost"))
+    record_cmd.add_argument("--duration", type=float, default=None, help="seconds to record (default: until Ctrl+C)")
+
+    replay_cmd = commands.add_parser("replay", help="replay a recording into the service or a broker")
+    replay_cmd.add_argument("path")
+    replay_cmd.add_argument("--speed", type=float, default=1.0, help="1 = real time, N = N times faster, 0 = max speed")
+    replay_cmd.add_argument("--broker", default=None, help="publish to this broker instead of the in-process service")
+    replay_cmd.add_argument(
+        "--max-gap", type=float, default=DEFAULT_MAX_GAP_SEC, help="longest pause between messages, in recorded seconds"
+    )
+
+    args = parser.parse_args(argv)
+    # Keep ingest logging out of the way when replaying as a benchmark.
+    logging.basicConfig(level=logging.INFO if args.command == "record" else logging.WARNING)
+    if args.command == "record":
+        count = asyncio.run(record_broker(args.broker, args.path, duration=args.duration))
+        print(f"Recorded {count} messages to {args.path}")
+    elif args.broker:
+        count = asyncio.run(replay_to_broker(args.path, args.broker, args.speed, args.max_gap))
+        print(f"Published {count} messages to {args.broker}")
+    else:
+        report = asyncio.run(replay_to_service(args.path, args.speed, args.max_gap))
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from collections import deque
+from statistics import median
+from typing import Deque, Optional
+
+# Scale factor that makes the median absolute deviation a consistent estimate of sigma.
+MAD_SCALE = 1.4826
+
+
+class HampelFilter:
+    """Bounded rolling-median outlier filter for noisy power readings.
+
+    Raw readings go into a ``window``-sized buffer. A reading that deviates from the
+    window median by more than ``k`` scaled MADs (and at least ``min_dev``) is replaced
+    by the median. Because raw values stay in the buffer, a real level change takes over
+    the median once it makes up most of the window. A missing reading (None) is
+    replaced by the median when there is history. Until ``min_samples`` readings are
+    buffered, readings pass through unchanged.
+    """
+
+    def __init__(self, window: int = 5, k: float = 3.0, min_dev: float = 10.0, min_samples: int = 3):
+        self.window = max(window, 1)
+        self.k = k
+        self.min_dev = min_dev
+        self.min_samples = max(min_samples, 2)
+        self.samples: Deque[float] = deque(maxlen=self.window)
+        self.rejected = 0
+        self.last_rejected = False
+        self.last_raw: Optional[float] = None
+        self.last_filtered: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    @property
+    def enabled(self) -> bool:
+        return self.window >= self.min_samples
+
+    def reset(self):
+        self.samples.clear()
+        self.last_rejected = False
+        self.last_raw = None
+        self.last_filtered = None
+
+    def _spread(self, center: float) -> float:
+        mad = median(abs(sample - center) for sample in self.samples)
+        return max(self.k * MAD_SCALE * mad, self.min_dev)
+
+    def add(self, value: float | int | None) -> Optional[float]:
+        """Record ``value`` and return the reading to act on."""
+        try:
+            value = None if value is None else float(value)
+        except (TypeError, ValueError):
+            value = None
+        self.last_raw = value
+        self.last_rejected = False
+
+        if not self.enabled:
+            self.last_filtered = value
+            return value
+
+        history = len(self.samples) >= self.min_samples
+        if value is None:
+            filtered = median(self.samples) if history else None
+            self.last_rejected = history
+        else:
+            filtered = value
+            if history:
+                center = median(self.samples)
+                if abs(value - center) > self._spread(center):
+                    filtered = center
+                    self.last_rejected = True
+            self.samples.append(value)
+        if self.last_rejected:
+            self.rejected += 1
+        self.last_filtered = filtered
+        return filtered
+
+    def stats(self) -> dict:
+        if not self.samples:
+            return {"median_w": None, "mad_w": None, "samples": 0, "rejected": self.rejected}
+        center = median(self.samples)
+        mad = median(abs(sample - center) for sample in self.samples)
+        return {
+            "median_w": round(center, 1),
+            "mad_w": round(mad, 1),
+            "samples": len(self.samples),
+            "rejected": self.rejected,
+        }
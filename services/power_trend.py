@@ -0,0 +1,63 @@
+import math
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+class PowerTrend:
+    """Streaming power estimator: EWMA level plus least-squares slope over the last ``window`` readings.
+
+    Timestamps are monotonic seconds. The EWMA is time-weighted (``tau_sec``), so
+    sparse bulk-phase samples do not leave the level lagging behind a fast taper.
+    ``seconds_until(threshold)`` extrapolates the smoothed level along the current
+    slope to predict when the charger draw will fall below ``threshold`` (end of charge).
+    """
+
+    def __init__(self, tau_sec: float = 300.0, window: int = 4):
+        self.tau_sec = max(tau_sec, 1e-6)
+        self.samples: Deque[Tuple[float, float]] = deque(maxlen=max(window, 2))
+        self.ewma: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def reset(self):
+        self.samples.clear()
+        self.ewma = None
+
+    def add(self, ts: float, watts: float):
+        watts = float(watts)
+        if self.ewma is None or not self.samples:
+            self.ewma = watts
+        else:
+            alpha = 1 - math.exp(-max(ts - self.samples[-1][0], 0.0) / self.tau_sec)
+            self.ewma = alpha * watts + (1 - alpha) * self.ewma
+        self.samples.append((ts, watts))
+
+    def slope(self) -> Optional[float]:
+        """Least-squares slope in W/s over the window (None with fewer than two distinct timestamps)."""
+        count = len(self.samples)
+        if count < 2:
+            return None
+        mean_t = sum(ts for ts, _ in self.samples) / count
+        mean_w = sum(w for _, w in self.samples) / count
+        var_t = sum((ts - mean_t) ** 2 for ts, _ in self.samples)
+        if var_t <= 0:
+            return None
+        return sum((ts - mean_t) * (w - mean_w) for ts, w in self.samples) / var_t
+
+    def seconds_until(self, threshold: float) -> Optional[float]:
+        """Predicted seconds until the smoothed draw reaches ``threshold``; None if it is not falling."""
+        slope = self.slope()
+        if self.ewma is None or slope is None or slope >= 0:
+            return None
+        if self.ewma <= threshold:
+            return 0.0
+        return (self.ewma - threshold) / -slope
+
+    def stats(self) -> dict:
+        slope = self.slope()
+        return {
+            "ewma_w": None if self.ewma is None else round(self.ewma, 1),
+            "slope_w_per_min": None if slope is None else round(slope * 60, 2),
+            "samples": len(self.samples),
+        }
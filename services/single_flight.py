@@ -0,0 +1,75 @@
+import asyncio
+import time
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight request.
+
+    Callers that arrive while a request is running await the same task. With
+    ``max_age`` a caller may also accept the last successful result if it is
+    recent enough.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.cached = 0
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        max_age: Optional[float] = None,
+    ) -> Any:
+        if max_age is not None:
+            cached = self._results.get(key)
+            if cached is not None and self._clock() - cached[0] <= max_age:
+                self.cached += 1
+                return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.requests += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._finish, key))
+        else:
+            self.coalesced += 1
+        # Shield so one cancelled caller does not cancel the request for everyone else.
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable | None = None):
+        """Drop cached results and detach in-flight requests (all keys when ``key`` is None).
+
+        Requests already running still complete for their current callers, but
+        later callers start a fresh request instead of joining a stale one.
+        """
+        if key is None:
+            self._results.clear()
+            self._inflight.clear()
+        else:
+            self._results.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "cached": self.cached,
+            "in_flight": len(self._inflight),
+        }
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        current = self._inflight.get(key) is task
+        if current:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        # Reading the exception also marks it retrieved when no caller is left waiting.
+        if task.exception() is None and current:
+            self._results[key] = (self._clock(), task.result())
@@ -1,11 +1,27 @@
 import os
+import time
 import asyncio
 import logging
+from contextlib import nullcontext
 from tapo import ApiClient
 
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.single_flight import SingleFlight
+from utils.metrics import LatencyRecorder
+
+
+class TapoUnreachableError(ConnectionError):
+    """Raised when the plug does not accept a TCP connection, so no login is attempted."""
+
 
 class TapoService:
-    def __init__(self, username: str | None = None, password: str | None = None, ip_address: str | None = None):
+    def __init__(
+        self,
+        username: str | None = None,
+        password: str | None = None,
+        ip_address: str | None = None,
+        manager=None,
+    ):
         # Allow per-device credentials while keeping defaults for the charging plug.
         self.tapo_username = username or os.getenv("TAPO_USERNAME")
         self.tapo_password = password or os.getenv("TAPO_PASSWORD")
@@ -14,64 +30,213 @@ class TapoService:
         self.device = None
         # Skip re-login when we already have a paired device
         self.initialized = False
+        # Keep the authenticated handle alive for a while instead of re-handshaking on every call.
+        self.session_ttl_sec = max(float(os.getenv("TAPO_SESSION_TTL_SEC", "600")), 0)
+        self.session_expires_at: float | None = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Optional TapoClientManager sharing the ApiClient and in-flight request cap.
+        self.manager = manager
+        # Concurrent reads of the same kind share one request to the plug.
+        self.reads = SingleFlight()
+        # Cheap TCP connect to the plug's HTTP port before paying for a full handshake.
+        self.probe_port = int(os.getenv("TAPO_PROBE_PORT", "80"))
+        self.probe_timeout_sec = max(float(os.getenv("TAPO_PROBE_TIMEOUT_SEC", "0.8")), 0.05)
+        self.probe_latency = LatencyRecorder()
+        # Shared by everything that talks to this plug so a dead device is not hammered.
+        self.breaker = CircuitBreaker(
+            f"tapo:{self.ip_address}",
+            failure_threshold=int(os.getenv("TAPO_BREAKER_FAILURES", "3")),
+            base_backoff_sec=float(os.getenv("TAPO_BREAKER_BASE_SEC", "5")),
+            max_backoff_sec=float(os.getenv("TAPO_BREAKER_MAX_SEC", "300")),
+        )
 
-    async def initialize(self):
-        # Always clear session and re-login to avoid stale/expired sessions.
+    def session_valid(self) -> bool:
+        """Return True when a cached, unexpired session can be reused."""
+        if not self.initialized or self.device is None or self.session_expires_at is None:
+            return False
+        return time.monotonic() < self.session_expires_at
+
+    def invalidate(self):
+        """Drop the cached session so the next call performs a fresh login."""
         self.initialized = False
         self.device = None
+        self.session_expires_at = None
+        self.reads.forget()
+
+    def session_stats(self) -> dict:
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "valid": self.session_valid(),
+            "ttl_sec": self.session_ttl_sec,
+            "reads": self.reads.stats(),
+            "probe": self.probe_latency.summary(),
+            "circuit": self.breaker.status(),
+        }
+
+    def _slot(self):
+        """Return the shared in-flight limiter, or a no-op context when unmanaged."""
+        return self.manager.slot() if self.manager else nullcontext()
+
+    async def probe(self, timeout: float | None = None, use_breaker: bool = True) -> bool:
+        """Return True when the plug accepts a TCP connection within ``timeout`` seconds.
+
+        With ``use_breaker=False`` the probe neither waits for nor feeds the circuit breaker,
+        so frequent reachability checks keep working during an outage.
+        """
+        if use_breaker and not self.breaker.allow_request():
+            logging.debug(
+                "TAPO: Circuit open for %s; skipping probe (retry in %.0fs)", self.ip_address, self.breaker.retry_in()
+            )
+            return False
+        timeout = self.probe_timeout_sec if timeout is None else timeout
+        started = time.monotonic()
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip_address, self.probe_port), timeout=timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            self.probe_latency.record(time.monotonic() - started, ok=False)
+            if use_breaker:
+                self.breaker.record_failure()
+            logging.debug("TAPO: Probe of %s:%s failed: %s", self.ip_address, self.probe_port, e or "timeout")
+            return False
+        self.probe_latency.record(time.monotonic() - started)
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+    async def initialize(self, force: bool = False, probe: bool = True):
+        if not force and self.session_valid():
+            self.cache_hits += 1
+            logging.debug("TAPO: Reusing cached session for %s", self.ip_address)
+            return
+
+        self.cache_misses += 1
+        self.invalidate()
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(
+                f"Tapo device {self.ip_address} circuit open; retry in {self.breaker.retry_in():.0f}s"
+            )
+        if probe and not await self.probe():
+            logging.info("TAPO: Device %s unreachable; skipping login", self.ip_address)
+            raise TapoUnreachableError(f"Tapo device {self.ip_address} unreachable")
         logging.info("TAPO: Reconnecting to device %s", self.ip_address)
         try:
             await asyncio.wait_for(self._login(), timeout=20)
             logging.info("TAPO: Pairing successful")
+        except asyncio.TimeoutError:
+            self.breaker.record_failure()
+            logging.info("TAPO: Pairing timed out")
+            raise
         except Exception:
             logging.info("TAPO: Pairing failed")
             raise
 
     async def _login(self):
         try:
-            client = ApiClient(self.tapo_username, self.tapo_password)
-            self.device = await client.p110(self.ip_address)
+            if self.manager:
+                client = self.manager.client_for(self.tapo_username, self.tapo_password)
+            else:
+                client = ApiClient(self.tapo_username, self.tapo_password)
+            async with self._slot():
+                self.device = await client.p110(self.ip_address)
             self.initialized = True
+            self.session_expires_at = time.monotonic() + self.session_ttl_sec
+            self.breaker.record_success()
         except Exception as e:
+            self.breaker.record_failure()
             logging.debug(f"TAPO: Login failed with error: {e}")
             raise
 
+    async def _reconnect(self):
+        """Fresh login after a failed command; an unreachable plug counts as that command's failure.
+
+        The probe bypasses the breaker so one failed toggle feeds it exactly once.
+        """
+        self.invalidate()
+        if not await self.probe(use_breaker=False):
+            self.breaker.record_failure()
+            raise TapoUnreachableError(f"Tapo device {self.ip_address} unreachable")
+        await self.initialize(force=True, probe=False)
+
     async def turn_on(self):
         logging.info("TAPO: Turning device on...")
         try:
-            await self.device.on()
+            async with self._slot():
+                await self.device.on()
+            self.breaker.record_success()
         except Exception:
             # Session may be stale; reset and retry once
-            self.initialized = False
-            self.device = None
             logging.debug("TAPO: turn_on failed; resetting session and retrying")
-            await self.initialize()
-            await self.device.on()
+            await self._reconnect()
+            try:
+                async with self._slot():
+                    await self.device.on()
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+        finally:
+            # Readings taken before the switch no longer describe the device.
+            self.reads.forget()
 
     async def turn_off(self):
         logging.info("TAPO: Turning device off...")
         try:
-            await self.device.off()
+            async with self._slot():
+                await self.device.off()
+            self.breaker.record_success()
         except Exception:
-            self.initialized = False
-            self.device = None
             logging.debug("TAPO: turn_off failed; resetting session and retrying")
-            await self.initialize()
-            await self.device.off()
+            await self._reconnect()
+            try:
+                async with self._slot():
+                    await self.device.off()
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+        finally:
+            # Readings taken before the switch no longer describe the device.
+            self.reads.forget()
 
-    async def get_state(self):
+    async def get_state(self, max_age: float | None = None):
+        """Return device info; ``max_age`` accepts a cached reading up to that many seconds old."""
+        return await self.reads.do("get_state", self._fetch_state, max_age)
+
+    async def _fetch_state(self):
         try:
-            return await self.device.get_device_info()
+            async with self._slot():
+                info = await self.device.get_device_info()
         except Exception:
+            self.breaker.record_failure()
             # Force re-login on next attempt after auth/network failures
-            self.initialized = False
-            self.device = None
+            self.invalidate()
             logging.debug("TAPO: Failed to get state; session will be reset")
             raise
+        self.breaker.record_success()
+        return info
+
+    async def get_current_power(self, max_age: float | None = None):
+        """Return current power in watts; ``max_age`` accepts a cached reading up to that many seconds old."""
+        return await self.reads.do("get_current_power", self._fetch_current_power, max_age)
 
-    async def get_current_power(self):
+    async def _fetch_current_power(self):
         logging.info("TAPO: Fetching current power usage...")
-        raw_power = await self.device.get_current_power()
+        try:
+            async with self._slot():
+                raw_power = await self.device.get_current_power()
+        except Exception:
+            self.breaker.record_failure()
+            self.invalidate()
+            logging.debug("TAPO: Failed to get current power; session will be reset")
+            raise
+        self.breaker.record_success()
         # The SDK returns a CurrentPowerResult object; unwrap to the numeric value.
         if raw_power is None:
             return None
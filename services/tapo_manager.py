@@ -0,0 +1,87 @@
+import os
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from tapo import ApiClient
+
+from services.tapo import TapoService
+
+
+class TapoClientManager:
+    """Share one ApiClient per credential set and one TapoService per plug IP."""
+
+    def __init__(self, max_in_flight: int | None = None):
+        if max_in_flight is None:
+            max_in_flight = int(os.getenv("TAPO_MAX_IN_FLIGHT", "2"))
+        self.max_in_flight = max(max_in_flight, 1)
+        self._clients: Dict[Tuple[Optional[str], Optional[str]], ApiClient] = {}
+        self._services: Dict[str, TapoService] = {}
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+    def client_for(self, username: str | None, password: str | None) -> ApiClient:
+        key = (username, password)
+        client = self._clients.get(key)
+        if client is None:
+            client = ApiClient(username, password)
+            self._clients[key] = client
+            logging.debug("TAPO: Created shared ApiClient for %s", username)
+        return client
+
+    def service(
+        self,
+        ip_address: str | None = None,
+        username: str | None = None,
+        password: str | None = None,
+    ) -> TapoService:
+        """Return the registered service for a plug, creating it on first use."""
+        # Same env defaults as TapoService, resolved up front so a registered plug costs only a lookup.
+        ip_address = ip_address or os.getenv("CHARGING_SOCKET_DEVICE_ID") or os.getenv("TAPO_IP_ADDRESS")
+        existing = self._services.get(ip_address)
+        if existing is not None:
+            credentials = (username or os.getenv("TAPO_USERNAME"), password or os.getenv("TAPO_PASSWORD"))
+            if (existing.tapo_username, existing.tapo_password) != credentials:
+                logging.warning(
+                    "TAPO: Device %s already registered with different credentials; reusing existing session",
+                    ip_address,
+                )
+            return existing
+        service = TapoService(username=username, password=password, ip_address=ip_address, manager=self)
+        self._services[ip_address] = service
+        logging.info("TAPO: Registered device %s", ip_address)
+        return service
+
+    def services(self) -> Dict[str, TapoService]:
+        return dict(self._services)
+
+    def slot(self) -> asyncio.Semaphore:
+        """Async context manager capping concurrent requests across all plugs."""
+        return self._semaphore
+
+    async def _poll_one(self, service: TapoService):
+        try:
+            await service.initialize()
+            return await service.get_state()
+        except Exception as exc:
+            logging.debug("TAPO: Poll of %s failed: %s", service.ip_address, exc)
+            return exc
+
+    async def poll_all(self) -> Dict[str, object]:
+        """Fetch device info from every registered plug concurrently.
+
+        Values are the device info objects, or the raised exception for plugs that failed.
+        """
+        services = list(self._services.values())
+        results = await asyncio.gather(*(self._poll_one(service) for service in services))
+        return {service.ip_address: result for service, result in zip(services, results)}
+
+
+_default_manager: TapoClientManager | None = None
+
+
+def get_tapo_manager() -> TapoClientManager:
+    """Return the process-wide Tapo client manager."""
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = TapoClientManager()
+    return _default_manager
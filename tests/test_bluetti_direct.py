@@ -0,0 +1,68 @@
+import pytest
+from bluetti_mqtt.bus import CommandMessage, EventBus, ParserMessage
+from bluetti_mqtt.core import AC300
+
+from services.bluetti_direct import BluettiDirectPoller
+from services.bluettiMqtt import BluettiMQTTService
+
+
+@pytest.mark.asyncio
+async def test_parsed_fields_feed_service_state():
+    service = BluettiMQTTService()
+    poller = BluettiDirectPoller("AA:BB", 30, service.handle_state)
+    device = AC300("AA:BB", "123")
+
+    await poller._handle_parsed(
+        ParserMessage(device, {"total_battery_percent": 87, "ac_output_on": True, "unknown_field": 1})
+    )
+
+    assert service.device_name == "AC300-123"
+    assert service.status.total_battery_percent == 87
+    assert service.status.ac_output_on is True
+
+
+@pytest.mark.asyncio
+async def test_command_is_put_on_bus():
+    poller = BluettiDirectPoller("AA:BB", 30, lambda topic, payload: None)
+    device = AC300("AA:BB", "123")
+    poller.bus = EventBus()
+    poller.handler = type("Handler", (), {"devices": {"AA:BB": device}})()
+
+    assert await poller.command("ac_output_on", "ON") is True
+
+    message = poller.bus.queue.get_nowait()
+    assert isinstance(message, CommandMessage)
+    assert message.device is device
+
+
+@pytest.mark.asyncio
+async def test_pack_fields_are_bundled_into_pack_details():
+    service = BluettiMQTTService()
+    service.status_file = ""
+    poller = BluettiDirectPoller("AA:BB", 30, service.handle_state)
+    device = AC300("AA:BB", "123")
+
+    await poller._handle_parsed(ParserMessage(device, {"pack_num": 2, "pack_battery_percent": 71}))
+
+    assert service.status.pack_percent(2) == 71.0
+
+
+@pytest.mark.asyncio
+async def test_only_requested_fields_are_emitted_with_bluetti_mqtt_formatting():
+    seen = {}
+    poller = BluettiDirectPoller("AA:BB", 30, seen.__setitem__, fields={"ac_output_mode", "ac_input_power"})
+    device = AC300("AA:BB", "123")
+    mode = next(f for f in device.struct.fields if f.name == "ac_output_mode").enum
+    member = next(iter(mode))
+
+    await poller._handle_parsed(
+        ParserMessage(
+            device,
+            {"ac_output_mode": member, "ac_input_power": 350, "ac_output_on": True, "model": "AC300"},
+        )
+    )
+
+    assert seen == {
+        "bluetti/state/AC300-123/ac_output_mode": member.name,
+        "bluetti/state/AC300-123/ac_input_power": "350",
+    }
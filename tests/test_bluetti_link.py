@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from services.bluetti_link import BluettiLinkSupervisor
+
+
+class FakeService:
+    def __init__(self, connect_results):
+        self.broker_interval = "30"
+        self.live_interval = 30
+        self.device_connected = False
+        self.last_message_at = None
+        self.connect_results = list(connect_results)
+        self.connect_calls = 0
+        self.stops = 0
+
+    def seconds_since_last_message(self):
+        return None if self.last_message_at is None else time.monotonic() - self.last_message_at
+
+    async def connect(self):
+        self.connect_calls += 1
+        ok = self.connect_results.pop(0) if self.connect_results else True
+        if ok:
+            self.device_connected = True
+            self.last_message_at = time.monotonic()
+        return ok
+
+    def stop_client(self):
+        self.stops += 1
+
+    async def stop_broker(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_supervisor_retries_until_ready_then_idles():
+    service = FakeService([False, True])
+    link = BluettiLinkSupervisor(service)
+    link.reconnect_delay_sec = 0.01
+    link.health_interval_sec = 0.01
+
+    link.start()
+    assert await link.wait_ready(1) is True
+    await asyncio.sleep(0.05)
+    link.stop()
+
+    assert service.connect_calls == 2
+    assert link.is_healthy() is True
+
+
+@pytest.mark.asyncio
+async def test_stale_link_is_torn_down_and_reconnected():
+    service = FakeService([True, True])
+    link = BluettiLinkSupervisor(service)
+    link.health_interval_sec = 0.01
+    link.stale_after_sec = 10
+
+    link.start()
+    assert await link.wait_ready(1) is True
+    service.last_message_at -= 60
+    await asyncio.sleep(0.05)
+    link.stop()
+
+    assert service.stops == 1
+    assert service.connect_calls == 2
+
+
+def test_stale_threshold_follows_poll_interval(monkeypatch):
+    monkeypatch.delenv("BLUETTI_STALE_AFTER_SEC", raising=False)
+    service = FakeService([])
+    link = BluettiLinkSupervisor(service)
+
+    assert link.stale_after_sec == 120
+    # A requested cadence that is not running yet (broker mode) does not move the threshold.
+    service.broker_interval = "60"
+    assert link.stale_after_sec == 120
+    service.live_interval = 60
+    assert link.stale_after_sec == 240
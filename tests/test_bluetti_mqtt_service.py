@@ -0,0 +1,243 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from services.bluettiMqtt import BluettiMQTTService
+
+
+@pytest.fixture(autouse=True)
+def status_file(tmp_path, monkeypatch):
+    path = tmp_path / "bluetti_status.json"
+    monkeypatch.setenv("BLUETTI_STATUS_FILE", str(path))
+    return path
+
+
+def make_message(topic: str, payload: str):
+    return SimpleNamespace(topic=topic, payload=payload.encode())
+
+
+@pytest.mark.asyncio
+async def test_pairing_event_set_from_mqtt_thread():
+    service = BluettiMQTTService()
+    service.device_name = "AC300-1"
+    service._loop = asyncio.get_running_loop()
+
+    waiter = asyncio.create_task(service._wait_for_pairing())
+    field_waiter = asyncio.create_task(service.wait_for_field("total_battery_percent", timeout=1))
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    thread = threading.Thread(
+        target=service.on_message,
+        args=(None, None, make_message("bluetti/state/AC300-1/total_battery_percent", "87")),
+    )
+    thread.start()
+    thread.join()
+
+    await asyncio.wait_for(waiter, timeout=1)
+    assert await field_waiter is True
+    assert service.status.total_battery_percent == 87
+
+
+@pytest.mark.asyncio
+async def test_wait_for_field_times_out_without_messages():
+    service = BluettiMQTTService()
+    service._loop = asyncio.get_running_loop()
+
+    assert await service.wait_for_field("ac_output_power", timeout=0.01) is False
+
+
+def test_dispatch_uses_final_topic_segment_and_counts_unknown():
+    service = BluettiMQTTService()
+    service.device_name = "AC300-1"
+
+    service.on_message(None, None, make_message("bluetti/state/AC300-1/ac_output_power", "120"))
+    service.on_message(None, None, make_message("bluetti/state/AC300-1/ac_output_on", "ON"))
+    service.on_message(None, None, make_message("bluetti/state/AC300-1/internal_ac_output_power", "999"))
+    service.on_message(None, None, make_message("bluetti/state/AC300-1/internal_ac_output_power", "998"))
+    service.on_message(None, None, make_message("bluetti/state/AC300-2/ac_output_power", "5"))
+
+    assert service.status.ac_output_power == 120
+    assert service.status.ac_output_on is True
+    assert service.unknown_topics["internal_ac_output_power"] == 2
+    assert service.messages_received == 5
+
+
+@pytest.mark.asyncio
+async def test_pack_details_and_extended_fields_are_parsed(status_file):
+    service = BluettiMQTTService()
+    service.device_name = "AC300-1"
+
+    service.on_message(None, None, make_message("bluetti/state/AC300-1/ac_input_voltage", "231.4"))
+    service.on_message(None, None, make_message("bluetti/state/AC300-1/ac_output_mode", "INVERTER_OUTPUT"))
+    service.on_message(
+        None,
+        None,
+        make_message(
+            "bluetti/state/AC300-1/pack_details2",
+            '{"status":"DISCHARGING","percent":64,"voltage":52.1,"voltages":[3.25,3.26]}',
+        ),
+    )
+    service.on_message(None, None, make_message("bluetti/state/AC300-1/pack_details3", "{not json"))
+
+    assert service.status.ac_input_voltage == 231.4
+    assert service.status.ac_output_mode == "INVERTER_OUTPUT"
+    assert service.status.pack_percent(2) == 64.0
+    assert service.status.packs[2].cell_voltages == (3.25, 3.26)
+    assert 3 not in service.status.packs
+    assert not service.unknown_topics
+
+    await service.flush_status_file()
+    snapshot = json.loads(status_file.read_text())
+    assert snapshot["ac_input_voltage"] == 231.4
+    assert snapshot["device_name"] == "AC300-1"
+
+
+@pytest.mark.asyncio
+async def test_status_file_is_written_by_the_writer_task_not_on_ingest(status_file):
+    service = BluettiMQTTService()
+    service.device_name = "AC300-1"
+    service.status_file_interval_sec = 0.01
+
+    service.on_message(None, None, make_message("bluetti/state/AC300-1/total_battery_percent", "50"))
+    assert not status_file.exists()
+
+    service.start_status_writer()
+    await asyncio.sleep(0.05)
+    assert json.loads(status_file.read_text())["total_battery_percent"] == 50
+
+    # Nothing new arrived: the file is left alone.
+    status_file.unlink()
+    await asyncio.sleep(0.05)
+    assert not status_file.exists()
+
+    service.on_message(None, None, make_message("bluetti/state/AC300-1/total_battery_percent", "51"))
+    await asyncio.sleep(0.05)
+    assert json.loads(status_file.read_text())["total_battery_percent"] == 51
+    service.stop_client()
+
+
+def test_unparsable_payload_is_ignored():
+    service = BluettiMQTTService()
+    service.device_name = "AC300-1"
+
+    service.on_message(None, None, make_message("bluetti/state/AC300-1/total_battery_percent", "n/a"))
+
+    assert service.status.total_battery_percent is None
+
+
+@pytest.mark.asyncio
+async def test_asyncio_transport_publish_awaits_client(monkeypatch):
+    monkeypatch.setenv("BLUETTI_MQTT_TRANSPORT", "asyncio")
+    service = BluettiMQTTService()
+    service.device_name = "AC300-1"
+    published = []
+
+    class FakeAsyncClient:
+        async def publish(self, topic, payload):
+            published.append((topic, payload))
+
+    assert await service.publish("bluetti/command/AC300-1/ac_output_on", "ON") is False
+
+    service._async_client = FakeAsyncClient()
+    await service.set_ac_output("ON")
+
+    assert published == [("bluetti/command/AC300-1/ac_output_on", "ON")]
+
+
+@pytest.mark.asyncio
+async def test_confirmed_command_resolves_on_matching_state():
+    service = BluettiMQTTService()
+    service.device_name = "AC300-1"
+    service._loop = asyncio.get_running_loop()
+
+    async def publish(topic, payload):
+        # Device echoes a stale value first, then the commanded one.
+        service.handle_state("bluetti/state/AC300-1/ac_output_on", "OFF")
+        service.handle_state("bluetti/state/AC300-1/ac_output_on", payload)
+        return True
+
+    service.publish = publish
+
+    assert await service.set_ac_output("ON", confirm=True, timeout=1) is True
+    assert service.command_latency.count == 1
+    assert service._ack_waiters["ac_output_on"] == []
+
+
+@pytest.mark.asyncio
+async def test_confirmed_command_retries_then_gives_up():
+    service = BluettiMQTTService()
+    service.device_name = "AC300-1"
+    service.command_retry_backoff_sec = 0
+    sent = []
+
+    async def publish(topic, payload):
+        sent.append(payload)
+        return True
+
+    service.publish = publish
+
+    assert await service.send_command("ac_output_on", "ON", confirm=True, timeout=0.01, retries=2) is False
+    assert sent == ["ON", "ON", "ON"]
+    assert service.command_latency.timeouts == 3
+
+
+@pytest.mark.asyncio
+async def test_unexpected_broker_exit_notifies_listeners():
+    service = BluettiMQTTService()
+    exits = []
+    service.add_broker_exit_listener(exits.append)
+    service.device_connected = True
+    service.connected_event.set()
+
+    process = await asyncio.create_subprocess_exec("sh", "-c", "exit 3")
+    service.broker_process = process
+    await service._watch_broker_exit(process)
+
+    assert exits == [3]
+    assert service.device_connected is False
+    assert not service.connected_event.is_set()
+
+
+@pytest.mark.asyncio
+async def test_stop_broker_terminates_without_notifying():
+    service = BluettiMQTTService()
+    exits = []
+    service.add_broker_exit_listener(exits.append)
+    process = await asyncio.create_subprocess_exec("sleep", "30")
+    service.broker_process = process
+    watcher = asyncio.create_task(service._watch_broker_exit(process))
+
+    await service.stop_broker()
+    await watcher
+
+    assert process.returncode is not None
+    assert exits == []
+
+
+def test_poll_interval_applies_live_in_direct_mode(monkeypatch):
+    monkeypatch.delenv("BLUETTI_COMMAND_ACK_TIMEOUT_SEC", raising=False)
+    service = BluettiMQTTService()
+    service.mode = "direct"
+    service.direct_poller = SimpleNamespace(interval=30, handler=SimpleNamespace(interval=30))
+
+    assert service.set_poll_interval(10) is True
+    assert service.direct_poller.handler.interval == 10
+    assert service.live_interval == 10
+    assert service.command_ack_timeout_sec == 25.0
+
+
+def test_poll_interval_is_left_alone_in_broker_mode(monkeypatch):
+    monkeypatch.delenv("BLUETTI_COMMAND_ACK_TIMEOUT_SEC", raising=False)
+    monkeypatch.setenv("BLUETTI_BROKER_INTERVAL", "30")
+    service = BluettiMQTTService()
+    service.mode = "broker"
+    service.broker_process = SimpleNamespace(returncode=None)
+
+    assert service.set_poll_interval(10) is False
+    # Nothing is stored for a later, unrelated broker restart either.
+    assert service.broker_interval == "30"
+    assert service.command_ack_timeout_sec == 45.0
@@ -0,0 +1,73 @@
+import pytest
+
+from models.bluetti import BluettiStatus, FieldHistory
+
+
+def test_ring_buffer_overwrites_oldest():
+    history = FieldHistory(capacity=3)
+    for ts in range(5):
+        history.append(float(ts), float(ts * 10))
+
+    assert len(history) == 3
+    assert history.last() == (4.0, 40.0)
+    assert list(history.iter_recent()) == [(4.0, 40.0), (3.0, 30.0), (2.0, 20.0)]
+
+
+def test_window_stats_only_covers_recent_samples():
+    history = FieldHistory(capacity=10)
+    for ts, value in [(0, 500), (50, 10), (60, 30), (70, 20)]:
+        history.append(float(ts), float(value))
+
+    stats = history.window_stats(seconds=25, now=75.0)
+
+    assert stats == {"min": 10.0, "max": 30.0, "mean": 20.0, "count": 3}
+    assert history.window_stats(seconds=1, now=200.0) is None
+
+
+def test_status_tracks_timestamps_and_staleness():
+    status = BluettiStatus(history_capacity=8)
+    status.update_status("ac_output_power", 120, ts=100.0)
+    status.update_status("ac_output_on", True, ts=105.0)
+
+    assert status.last_updated("ac_output_power") == 100.0
+    assert status.is_stale("ac_output_power", max_age=30, now=120.0) is False
+    assert status.is_stale("ac_output_power", max_age=30, now=140.0) is True
+    assert status.is_stale("dc_output_power", max_age=30, now=120.0) is True
+    assert status.window_stats("ac_output_on", 10, now=106.0)["max"] == 1.0
+
+
+def test_status_rejects_unknown_attributes():
+    status = BluettiStatus()
+    with pytest.raises(AttributeError):
+        status.update_status("not_a_field", 1)
+
+
+def test_pack_updates_merge_and_record_percent_history():
+    status = BluettiStatus(history_capacity=8)
+    status.update_pack(2, {"status": "CHARGING", "percent": 40, "voltage": 51.0}, ts=10.0)
+    status.update_pack(2, {"percent": 42}, ts=20.0)
+
+    pack = status.get_status()["packs"][2]
+    assert pack == {"status": "CHARGING", "percent": 42.0, "voltage": 51.0, "cell_voltages": []}
+    assert status.last_updated("pack2_percent") == 20.0
+
+    status.update_status("ac_output_mode", "INVERTER_OUTPUT", ts=30.0)
+    assert status.last_updated("ac_output_mode") is None
+
+    status.reset_status()
+    assert status.packs == {}
+
+
+def test_resets_end_output_runs_in_history():
+    status = BluettiStatus(history_capacity=8)
+    status.update_status("ac_output_on", True, ts=100.0)
+    status.update_status("ac_output_on", True, ts=110.0)
+    assert status.held_since("ac_output_on", lambda on: on > 0) == 100.0
+
+    status.reset_output_status()
+    assert status.ac_output_on is False
+    assert status.held_since("ac_output_on", lambda on: on > 0) is None
+
+    status.update_status("ac_output_power", 50, ts=120.0)
+    status.reset_status()
+    assert status.last_updated("ac_output_power") is None
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta, time as dtime
 import pytest
 
 from services.boiler_scheduler import BoilerScheduler, BoilerConfig, Clock
+from services.circuit_breaker import CircuitBreaker
 
 
 class FakeClock(Clock):
@@ -28,8 +29,12 @@ class FakeTapo:
         self.power = power
         self.on_called = 0
         self.off_called = 0
+        self.breaker = CircuitBreaker("fake")
 
-    async def initialize(self):
+    async def probe(self):
+        return self.online
+
+    async def initialize(self, probe=True):
         if not self.online:
             raise RuntimeError("offline")
 
@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+import pytest
+
+from charging_state_handler import ChargingState, ChargingStateHandler, Wait
+from services.charging_circuits import ChargingCircuits, circuit_env_prefix, load_circuits
+from utils.clock import VirtualClock
+
+
+class IdleBluetti:
+    async def wait_for_update(self, fields, timeout=None):
+        await asyncio.sleep(3600 if timeout is None else timeout)
+        return False
+
+    def get_status(self):
+        return {}
+
+
+class TickState(ChargingState):
+    def __init__(self, delay, crash_at=None):
+        self.delay = delay
+        self.crash_at = crash_at
+        self.ticks = 0
+
+    async def handle(self, handler):
+        self.ticks += 1
+        if self.ticks == self.crash_at:
+            raise RuntimeError("boom")
+        handler.low_power_counter = self.ticks
+        return Wait(self.delay)
+
+
+def make_handler(name, state, clock, bluetti):
+    handler = ChargingStateHandler(None, bluetti, clock=clock, state_file="", name=name, controls_bluetti=False)
+    handler.state = state
+    return handler
+
+
+def test_load_circuits_uses_prefixed_overrides(monkeypatch):
+    monkeypatch.setenv("CHARGING_CIRCUITS", "pack-a, packb")
+    monkeypatch.setenv("CHARGING_W_THRESHOLD", "20")
+    monkeypatch.setenv("CIRCUIT_PACK_A_TAPO_IP_ADDRESS", "10.0.0.2")
+    monkeypatch.setenv("CIRCUIT_PACKB_CHARGING_W_THRESHOLD", "35")
+
+    circuits = load_circuits()
+
+    assert circuit_env_prefix("pack-a") == "CIRCUIT_PACK_A_"
+    assert [c.name for c in circuits] == ["pack-a", "packb"]
+    assert circuits[0].ip_address == "10.0.0.2"
+    assert [c.config.charging_w_threshold for c in circuits] == [20, 35]
+    assert [c.controls_bluetti for c in circuits] == [True, False]
+    assert circuits[1].state_file == "logs/charging_state_packb.json"
+
+    monkeypatch.setenv("CIRCUIT_PACKB_CONTROLS_BLUETTI", "true")
+    assert [c.controls_bluetti for c in load_circuits()] == [False, True]
+    monkeypatch.setenv("CIRCUIT_PACK_A_CONTROLS_BLUETTI", "yes")
+    with pytest.raises(ValueError):
+        load_circuits()
+
+
+def test_circuits_run_independently_and_publish_status(tmp_path, caplog):
+    clock = VirtualClock()
+    bluetti = IdleBluetti()
+    steady = make_handler("a", TickState(60), clock, bluetti)
+    flaky = make_handler("b", TickState(60, crash_at=2), clock, bluetti)
+    status_file = tmp_path / "status.json"
+    circuits = ChargingCircuits([steady, flaky], status_file=str(status_file), clock=clock)
+
+    async def _run():
+        try:
+            await asyncio.wait_for(circuits.run(), timeout=600)
+        except asyncio.TimeoutError:
+            pass
+
+    with caplog.at_level("INFO"):
+        clock.run(_run())
+
+    # "a" ticks every 60s; "b" crashes on its second tick at 60s, restarts at 90s and keeps ticking.
+    assert steady.state.ticks == 10
+    assert flaky.state.ticks == 11
+    assert "Charging[b]: Circuit crashed" in caplog.text
+    status = json.loads(status_file.read_text())["circuits"]
+    assert set(status) == {"a", "b"}
+    assert status["a"]["state"] == "TickState"
+    assert status["a"]["low_power_counter"] == 10
+    assert status["b"]["next_wake_in_sec"] == 60
@@ -0,0 +1,30 @@
+import asyncio
+
+from services.charging_simulation import Scenario, simulate
+from utils.clock import VirtualClock
+
+
+def test_virtual_clock_runs_long_sleeps_instantly():
+    clock = VirtualClock()
+
+    async def _sleepy():
+        await asyncio.sleep(3 * 86400)
+        await clock.sleep(60)
+        return clock.monotonic()
+
+    assert clock.run(_sleepy()) == 3 * 86400 + 60
+    assert clock.now().day == 4
+
+
+def test_week_with_daily_outages():
+    report = simulate(Scenario.daily_outages(days=7, start_hour=18, hours=4))
+
+    # One charge session at startup plus one after every outage.
+    assert report["simulated_sec"] == 7 * 86400
+    assert report["socket_cycles"] >= 8
+    assert report["end_of_charge_detections"] == report["socket_cycles"]
+    # No AC load: every outage keep-alive is cut after the 300s zero-draw window.
+    assert report["ac_on_sec"] == 7 * 300
+    # Grid-presence detection: plug probes notice the outage and the restore within a minute.
+    assert report["outage_reaction_max_sec"] <= 60
+    assert report["restore_reaction_max_sec"] <= 60
@@ -0,0 +1,315 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import charging_state_handler
+from charging_state_handler import (
+    ChargingEvent,
+    ChargingState,
+    ChargingStateHandler,
+    MonitorChargingState,
+    RecheckState,
+    StartChargingState,
+    Wait,
+    WaitPowerState,
+)
+from utils.clock import VirtualClock
+from controllers.bluetti import BluettiController
+
+
+class FakeTapoController:
+    pass
+
+
+@pytest.fixture
+def bluetti(monkeypatch):
+    monkeypatch.setenv("BLUETTI_STATUS_FILE", "")
+    monkeypatch.setenv("CHARGING_STATE_FILE", "")
+    controller = BluettiController()
+    controller.bluetti.device_name = "AC300-1"
+    controller.off_calls = []
+
+    async def turn_ac(state, confirm=False, timeout=None):
+        controller.off_calls.append(time.monotonic())
+        return True
+
+    controller.turn_ac = turn_ac
+    return controller
+
+
+def feed(controller, field, payload):
+    controller.bluetti.handle_state(f"bluetti/state/AC300-1/{field}", payload)
+
+
+@pytest.mark.asyncio
+async def test_offline_recovery_cuts_ac_after_zero_draw_window(bluetti, monkeypatch):
+    monkeypatch.setattr(charging_state_handler, "OFFLINE_ZERO_DRAW_SEC", 0.2)
+    handler = ChargingStateHandler(FakeTapoController(), bluetti)
+
+    handler.schedule_offline_recovery_check()
+    feed(bluetti, "ac_output_on", "ON")
+    feed(bluetti, "ac_output_power", "40")
+    await asyncio.sleep(0.3)
+    assert bluetti.off_calls == []
+
+    started = time.monotonic()
+    feed(bluetti, "ac_output_power", "0")
+    await asyncio.sleep(0.1)
+    feed(bluetti, "ac_output_power", "0")
+    await asyncio.sleep(0.2)
+
+    assert len(bluetti.off_calls) == 1
+    # Deadline counts from the first zero reading, not from the latest wakeup.
+    assert bluetti.off_calls[0] - started < 0.28
+    handler.offline_recovery_task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_offline_recovery_resets_on_load(bluetti, monkeypatch):
+    monkeypatch.setattr(charging_state_handler, "OFFLINE_ZERO_DRAW_SEC", 0.2)
+    handler = ChargingStateHandler(FakeTapoController(), bluetti)
+
+    handler.schedule_offline_recovery_check()
+    feed(bluetti, "ac_output_on", "ON")
+    feed(bluetti, "ac_output_power", "0")
+    await asyncio.sleep(0.15)
+    feed(bluetti, "ac_output_power", "35")
+    await asyncio.sleep(0.15)
+
+    assert bluetti.off_calls == []
+    handler.offline_recovery_task.cancel()
+
+
+class SleepyState(ChargingState):
+    async def handle(self, handler):
+        return Wait(5, (ChargingEvent.GRID,))
+
+
+@pytest.mark.asyncio
+async def test_wait_is_cut_short_by_grid_event_only(bluetti):
+    handler = ChargingStateHandler(FakeTapoController(), bluetti)
+    handler.state = SleepyState()
+    # Notified before the step started: must not end the next wait.
+    handler.notify(ChargingEvent.GRID)
+
+    step = asyncio.create_task(handler.handle_state())
+    await asyncio.sleep(0.05)
+    handler.notify("unrelated")
+    await asyncio.sleep(0.05)
+    assert not step.done()
+    assert handler.next_wake_at is not None
+
+    handler.notify(ChargingEvent.GRID)
+    await asyncio.wait_for(step, timeout=0.5)
+
+
+@pytest.mark.asyncio
+async def test_grid_watch_notifies_on_input_transitions(bluetti, monkeypatch):
+    # No plug probe to consult here, so a confirmed drop means grid-down.
+    monkeypatch.setenv("GRID_DOWN_CONFIRM_SEC", "0")
+    handler = ChargingStateHandler(FakeTapoController(), bluetti)
+    handler.start_grid_watch()
+    await asyncio.sleep(0)
+
+    for payload in ("0", "0", "350", "360", "0"):
+        feed(bluetti, "ac_input_power", payload)
+        await asyncio.sleep(0.01)
+
+    assert handler.event_counts.get(ChargingEvent.GRID) == 2
+    handler.grid_watch_task.cancel()
+
+
+def make_persisting_handler(bluetti, path, clock):
+    return ChargingStateHandler(FakeTapoController(), bluetti, clock=clock, state_file=str(path))
+
+
+def test_restore_resumes_monitor_timing_across_restart(bluetti, tmp_path):
+    path = tmp_path / "charging_state.json"
+    clock = VirtualClock()
+    clock.advance(5000)
+    handler = make_persisting_handler(bluetti, path, clock)
+    handler.state = MonitorChargingState()
+    handler.socket_on_at = clock.monotonic() - 1000
+    handler.first_power_check_at = clock.monotonic() + 20
+    handler.low_power_counter = 2
+    handler.save_state()
+
+    clock.advance(60)
+    restored = make_persisting_handler(bluetti, path, clock)
+
+    assert restored.restore_state() is True
+    assert isinstance(restored.state, MonitorChargingState)
+    assert clock.monotonic() - restored.socket_on_at == pytest.approx(1060)
+    assert restored.first_power_check_at == pytest.approx(clock.monotonic())
+    assert restored.low_power_counter == 2
+    assert restored.first_launch is True
+
+
+def test_restore_quick_recheck_resumes_monitoring(bluetti, tmp_path):
+    path = tmp_path / "charging_state.json"
+    clock = VirtualClock()
+    handler = make_persisting_handler(bluetti, path, clock)
+    handler.state = RecheckState()
+    handler.recheck_phase = "quick"
+    handler.socket_on_at = 0.0
+    handler.save_state()
+
+    restored = make_persisting_handler(bluetti, path, clock)
+
+    assert restored.restore_state() is True
+    assert isinstance(restored.state, MonitorChargingState)
+
+
+@pytest.mark.asyncio
+async def test_restore_outage_wait_only_watches_bluetti_on_controlling_circuit(bluetti, tmp_path):
+    path = tmp_path / "charging_state.json"
+    clock = VirtualClock()
+    handler = make_persisting_handler(bluetti, path, clock)
+    handler.offline_seen_in_wait = True
+    handler.save_state()
+
+    secondary = ChargingStateHandler(
+        FakeTapoController(), bluetti, clock=clock, state_file=str(path), controls_bluetti=False
+    )
+    assert secondary.restore_state() is True
+    assert isinstance(secondary.state, WaitPowerState)
+    assert secondary.offline_seen_in_wait is True
+    assert secondary.offline_recovery_task is None
+
+    assert handler.restore_state() is True
+    assert handler.offline_recovery_task is not None
+    handler.offline_recovery_task.cancel()
+
+
+def test_restore_off_recheck_resumes_the_remaining_pause(bluetti, tmp_path, monkeypatch):
+    monkeypatch.setenv("RECHECK_OFF_SEC", "90")
+    path = tmp_path / "charging_state.json"
+    clock = VirtualClock()
+    tapo = RecheckTapo(clock, [])
+    handler = ChargingStateHandler(tapo, bluetti, clock=clock, state_file=str(path))
+    handler.state = RecheckState()
+    clock.run(handler.state.handle(handler))
+    handler.save_state()
+
+    clock.advance(30)
+    restored = ChargingStateHandler(tapo, bluetti, clock=clock, state_file=str(path))
+    assert restored.restore_state() is True
+    assert restored.recheck_phase == "off"
+
+    wait = clock.run(restored.state.handle(restored))
+    assert wait.delay == pytest.approx(60)
+    # No second power cycle: the socket was switched off once, before the restart.
+    assert tapo.calls == [("off", 0)]
+
+
+def test_restore_ignores_stale_or_skewed_snapshots(bluetti, tmp_path):
+    path = tmp_path / "charging_state.json"
+    clock = VirtualClock()
+    handler = make_persisting_handler(bluetti, path, clock)
+    handler.state = MonitorChargingState()
+    handler.save_state()
+
+    # Too long ago: the socket state is unknown, start fresh.
+    clock.advance(handler.resume_max_gap_sec + 1)
+    stale = make_persisting_handler(bluetti, path, clock)
+    assert stale.restore_state() is False
+    assert isinstance(stale.state, WaitPowerState)
+
+    # Different boot and a wall clock behind the snapshot: downtime unknown, start fresh.
+    data = json.loads(path.read_text())
+    data.update(boot_id="other-boot", saved_at=clock.now().timestamp() + 3600)
+    path.write_text(json.dumps(data))
+    assert make_persisting_handler(bluetti, path, clock).restore_state() is False
+
+
+class SwitchingTapo:
+    def __init__(self, clock):
+        self.clock = clock
+        self.on_at = None
+
+    async def start_charging(self):
+        await asyncio.sleep(1)
+        self.on_at = self.clock.monotonic()
+
+
+def test_start_charging_does_not_wait_for_slow_bluetti_pairing(bluetti, monkeypatch):
+    monkeypatch.setenv("BLUETTI_ACTION_TIMEOUT_SEC", "45")
+    clock = VirtualClock()
+    tapo = SwitchingTapo(clock)
+
+    async def slow_initialize():
+        await asyncio.sleep(600)
+
+    bluetti.initialize = slow_initialize
+    handler = ChargingStateHandler(tapo, bluetti, clock=clock)
+    handler.state = StartChargingState()
+
+    clock.run(handler.state.handle(handler))
+
+    assert tapo.on_at == 1
+    # The Bluetti action gave up after its own timeout; charging still proceeds.
+    assert clock.monotonic() == 45
+    assert isinstance(handler.state, MonitorChargingState)
+    assert bluetti.off_calls == []
+
+
+class RecheckTapo:
+    def __init__(self, clock, readings):
+        self.clock = clock
+        self.readings = list(readings)
+        self.calls = []
+
+    async def stop_charging(self):
+        self.calls.append(("off", self.clock.monotonic()))
+
+    async def start_charging(self):
+        self.calls.append(("on", self.clock.monotonic()))
+
+    async def get_current_power(self):
+        self.calls.append(("read", self.clock.monotonic()))
+        return self.readings.pop(0)
+
+
+async def run_recheck(handler):
+    while isinstance(handler.state, RecheckState):
+        await handler.handle_state()
+
+
+def test_recheck_pauses_are_wait_steps(bluetti, monkeypatch):
+    monkeypatch.setenv("RECHECK_OFF_SEC", "90")
+    monkeypatch.setenv("RECHECK_QUICK_CHECKS", "3")
+    monkeypatch.setenv("RECHECK_QUICK_INTERVAL_SEC", "20")
+    clock = VirtualClock()
+    tapo = RecheckTapo(clock, [2, 3, 2])
+    handler = ChargingStateHandler(tapo, bluetti, clock=clock)
+    handler.state = RecheckState()
+
+    clock.run(run_recheck(handler))
+
+    assert tapo.calls == [("off", 0), ("on", 90), ("read", 110), ("read", 130), ("read", 150)]
+    assert handler.state.__class__.__name__ == "StopChargingState"
+
+
+def test_recheck_abandoned_when_grid_lost_during_off_pause(bluetti, monkeypatch):
+    monkeypatch.setenv("RECHECK_OFF_SEC", "90")
+    clock = VirtualClock()
+    tapo = RecheckTapo(clock, [])
+    handler = ChargingStateHandler(tapo, bluetti, clock=clock)
+    handler.state = RecheckState()
+
+    async def scenario():
+        async def lose_grid():
+            await clock.sleep(10)
+            handler.grid.present = False
+            handler.notify(ChargingEvent.GRID)
+
+        asyncio.ensure_future(lose_grid())
+        await run_recheck(handler)
+
+    clock.run(scenario())
+
+    assert clock.monotonic() == 10
+    assert tapo.calls == [("off", 0)]
+    assert isinstance(handler.state, WaitPowerState)
@@ -1,4 +1,5 @@
 from services.charging_supervisor import ChargingSupervisor, ChargingConfig
+from services.power_trend import PowerTrend
 
 
 def make_config(**overrides) -> ChargingConfig:
@@ -6,6 +7,7 @@ def make_config(**overrides) -> ChargingConfig:
         charging_w_threshold=20,
         low_power_consecutive_count=3,
         check_interval_sec=900,
+        first_power_check_delay_sec=30,
         startup_grace_sec=90,
         min_on_time_sec=1200,
         stable_power_checks=2,
@@ -40,3 +42,36 @@ def test_recheck_confirms_charging_with_any_high_reading():
     supervisor = ChargingSupervisor(make_config(charging_w_threshold=15))
     assert supervisor.recheck_confirms_charging([5, 8, 10]) is False
     assert supervisor.recheck_confirms_charging([5, 18, 8]) is True
+
+
+def test_next_check_interval_speeds_up_during_taper():
+    config = make_config(charging_w_threshold=20, check_interval_sec=900, sample_min_interval_sec=60)
+    supervisor = ChargingSupervisor(config)
+    trend = PowerTrend(tau_sec=1)
+
+    trend.add(0, 500)
+    assert supervisor.next_check_interval(trend, 500) == 60  # still learning the trend
+    trend.add(900, 500)
+    trend.add(1800, 500)
+    assert supervisor.next_check_interval(trend, 500) == 900  # bulk phase
+    trend.add(2700, 120)
+    assert 60 <= supervisor.next_check_interval(trend, 120) < 900  # tapering
+    assert supervisor.next_check_interval(trend, 10) == 60  # already low
+
+    disabled = ChargingSupervisor(make_config(adaptive_sampling_enabled=False))
+    assert disabled.next_check_interval(trend, 120) == 900
+
+
+def test_filtered_dropout_does_not_count_as_low_power_and_resamples_soon():
+    supervisor = ChargingSupervisor(make_config(check_interval_sec=900, sample_min_interval_sec=60))
+    trend = PowerTrend(window=4)
+    for ts, watts in [(0, 480), (900, 481), (1800, 480)]:
+        trend.add(ts, supervisor.filter_power(watts))
+
+    power = supervisor.filter_power(0)
+    assert supervisor.is_charging(power) is True
+    assert supervisor.filter_stats()["raw_w"] == 0.0
+    assert supervisor.next_check_interval(trend, power) == 60
+
+    supervisor.reset_filter()
+    assert supervisor.filter_power(0) == 0.0
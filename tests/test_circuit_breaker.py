@@ -0,0 +1,74 @@
+from services.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_breaker(clock, **overrides) -> CircuitBreaker:
+    params = dict(failure_threshold=3, base_backoff_sec=10, max_backoff_sec=40, jitter=0.0, clock=clock)
+    params.update(overrides)
+    return CircuitBreaker("test", **params)
+
+
+def test_opens_after_threshold_and_blocks_until_backoff():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.allow_request() is False
+    assert breaker.retry_in() == 10
+
+    clock.now = 10
+    assert breaker.allow_request() is True
+    assert breaker.state == CircuitState.HALF_OPEN
+
+
+def test_half_open_failure_doubles_backoff_up_to_max():
+    clock = FakeClock()
+    breaker = make_breaker(clock, failure_threshold=1)
+
+    backoffs = []
+    for _ in range(4):
+        breaker.record_failure()
+        backoffs.append(breaker.retry_in())
+        clock.now += breaker.retry_in()
+        assert breaker.allow_request() is True
+
+    assert backoffs == [10, 20, 40, 40]
+
+
+def test_success_closes_and_resets_backoff():
+    clock = FakeClock()
+    breaker = make_breaker(clock, failure_threshold=1)
+    breaker.record_failure()
+    clock.now = 10
+    breaker.allow_request()
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.status()["trips"] == 0
+    breaker.record_failure()
+    assert breaker.retry_in() == 10
+
+
+def test_jitter_stays_within_bounds():
+    clock = FakeClock()
+    low = make_breaker(clock, failure_threshold=1, jitter=0.5, rng=lambda: 0.0)
+    high = make_breaker(clock, failure_threshold=1, jitter=0.5, rng=lambda: 1.0)
+
+    low.record_failure()
+    high.record_failure()
+
+    assert low.retry_in() == 5
+    assert high.retry_in() == 15
@@ -0,0 +1,39 @@
+import asyncio
+
+from services.device_actions import DeviceAction, run_actions, sequence
+from utils.clock import VirtualClock
+
+
+def test_actions_run_concurrently_with_their_own_timeouts():
+    clock = VirtualClock()
+    calls = []
+
+    async def slow_pairing():
+        calls.append("pair")
+        await asyncio.sleep(300)
+
+    async def switch():
+        await asyncio.sleep(2)
+        return "on"
+
+    async def broken():
+        raise ConnectionError("offline")
+
+    async def _run():
+        return await run_actions(
+            DeviceAction("socket", switch, timeout=10),
+            DeviceAction("bluetti", sequence(slow_pairing, switch), timeout=60),
+            DeviceAction("other", broken),
+            clock=clock,
+        )
+
+    results = clock.run(_run())
+
+    # Total latency is the longest timeout, not the sum of all actions.
+    assert clock.monotonic() == 60
+    assert results["socket"].ok and results["socket"].value == "on"
+    assert results["socket"].elapsed_sec == 2
+    assert results["bluetti"].timed_out and not results["bluetti"].ok
+    assert results["bluetti"].describe() == "bluetti timed out in 60.0s"
+    assert isinstance(results["other"].error, ConnectionError)
+    assert calls == ["pair"]
@@ -0,0 +1,107 @@
+import asyncio
+
+from services.grid_presence import GridPresence, GridPresenceConfig
+from utils.clock import VirtualClock
+
+
+class FakeBluetti:
+    def __init__(self):
+        self.status = {}
+        self._updated = asyncio.Event()
+
+    async def wait_for_update(self, fields, timeout=None):
+        try:
+            await asyncio.wait_for(self._updated.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def get_status(self):
+        return dict(self.status)
+
+    def feed(self, watts):
+        self.status["ac_input_power"] = watts
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+
+class Plug:
+    def __init__(self):
+        self.reachable = True
+        self.probes = 0
+
+    async def probe(self):
+        self.probes += 1
+        return self.reachable
+
+
+async def stop(detector):
+    detector.stop()
+    await asyncio.sleep(1)
+
+
+def make_detector(clock, plug):
+    config = GridPresenceConfig(down_confirm_sec=20, up_confirm_sec=10, probe_interval_sec=30)
+    detector = GridPresence(FakeBluetti(), probes=[plug.probe], config=config, clock=clock)
+    events = []
+    detector.subscribe(lambda present, reason: events.append((clock.monotonic(), present)))
+    return detector, events
+
+
+def test_input_drop_needs_unreachable_plug_to_mean_grid_down():
+    clock = VirtualClock()
+    plug = Plug()
+    detector, events = make_detector(clock, plug)
+
+    async def _scenario():
+        detector.start()
+        bluetti = detector.bluetti_controller
+        await asyncio.sleep(5)
+        bluetti.feed(400)
+        await asyncio.sleep(20)
+        assert detector.input_flowing is True
+        # Socket switched off (t=25): input stops but the plug still answers.
+        bluetti.feed(0)
+        await asyncio.sleep(42)
+        assert detector.present is True
+        bluetti.feed(400)
+        await asyncio.sleep(7)
+        # Between the thresholds: hysteresis keeps the input counted as flowing.
+        bluetti.feed(12)
+        await asyncio.sleep(7)
+        assert detector.input_flowing is True
+        # Outage (t=81): input stops and the plug goes dark.
+        plug.reachable = False
+        bluetti.feed(0)
+        await asyncio.sleep(25)
+        await stop(detector)
+
+    clock.run(_scenario())
+
+    assert events == [(101, False)]
+
+
+def test_probes_detect_outage_and_return_without_input_and_ignore_flicker():
+    clock = VirtualClock()
+    plug = Plug()
+    detector, events = make_detector(clock, plug)
+
+    async def _scenario():
+        detector.start()
+        await asyncio.sleep(45)
+        assert detector.present is True
+        plug.reachable = False
+        await asyncio.sleep(100)
+        # Flicker at t=145: back for less than up_confirm_sec, seen by the 150s probe only.
+        plug.reachable = True
+        await asyncio.sleep(7)
+        plug.reachable = False
+        await asyncio.sleep(60)
+        plug.reachable = True
+        await asyncio.sleep(60)
+        await stop(detector)
+
+    clock.run(_scenario())
+
+    # Down at the 60s probe + 20s confirmation; flicker ignored; back at the 240s probe + 10s confirmation.
+    assert events == [(80, False), (250, True)]
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+
+from services.mqtt_recorder import MqttRecorder, read_recording, replay, replay_to_service
+
+
+def write_recording(path, records):
+    recorder = MqttRecorder(str(path))
+    for ts, topic, payload in records:
+        recorder.record(topic, payload, ts)
+    recorder.close()
+
+
+def test_round_trip_and_truncated_tail(tmp_path):
+    path = tmp_path / "capture.bqmq"
+    records = [
+        (10.0, "bluetti/state/AC300-1/total_battery_percent", "87"),
+        (10.5, "bluetti/state/AC300-1/pack_details2", '{"percent":64}'),
+    ]
+    write_recording(path, records)
+    # Appending reopens without a second header; the new session's times restart at 0.
+    write_recording(path, [(3.0, "bluetti/state/AC300-1/ac_output_on", "ON")])
+    with open(path, "ab") as f:
+        f.write(b"\x00\x01")
+
+    assert list(read_recording(str(path))) == [
+        (0.0, "bluetti/state/AC300-1/total_battery_percent", "87"),
+        (0.5, "bluetti/state/AC300-1/pack_details2", '{"percent":64}'),
+        (0.0, "bluetti/state/AC300-1/ac_output_on", "ON"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_replay_keeps_spacing_scaled_by_speed():
+    records = [(100.0, "a", "1"), (101.0, "b", "2"), (102.0, "c", "3")]
+    seen = []
+
+    started = time.monotonic()
+    count = await replay(records, lambda topic, payload: seen.append(topic), speed=20)
+
+    assert count == 3
+    assert seen == ["a", "b", "c"]
+    assert 0.09 <= time.monotonic() - started < 0.5
+
+
+@pytest.mark.asyncio
+async def test_replay_clamps_backward_and_huge_gaps():
+    # A restart (time goes back) and a long pause must neither burst nor stall the replay.
+    records = [(100.0, "a", "1"), (5000.0, "b", "2"), (3.0, "c", "3"), (3.5, "d", "4")]
+    seen = []
+
+    started = time.monotonic()
+    count = await replay(records, lambda topic, payload: seen.append(topic), speed=1, max_gap=0.1)
+
+    assert count == 4
+    assert seen == ["a", "b", "c", "d"]
+    assert 0.15 <= time.monotonic() - started < 0.5
+
+
+@pytest.mark.asyncio
+async def test_replay_into_service_applies_state(tmp_path, monkeypatch):
+    monkeypatch.delenv("BLUETTI_RECORD_FILE", raising=False)
+    path = tmp_path / "capture.bqmq"
+    write_recording(
+        path,
+        [(float(i), "bluetti/state/AC300-1/ac_output_power", str(i)) for i in range(500)],
+    )
+
+    report = await replay_to_service(str(path), speed=0)
+
+    assert report["messages"] == 500
+    assert report["status"]["ac_output_power"] == 499
@@ -0,0 +1,32 @@
+from services.power_filter import HampelFilter
+
+
+def test_single_spike_and_garbage_are_replaced_by_median():
+    flt = HampelFilter(window=5, k=3.0, min_dev=10.0)
+    for watts in (300, 305, 298):
+        assert flt.add(watts) == watts
+
+    assert flt.add(2) == 300
+    assert flt.add(None) == 299
+    assert flt.add("garbage") == 299
+    assert flt.add(301) == 301
+    assert flt.stats() == {"median_w": 300.0, "mad_w": 2.0, "samples": 5, "rejected": 3}
+
+
+def test_sustained_level_change_passes_once_it_dominates_the_window():
+    flt = HampelFilter(window=5)
+    for watts in (300, 300, 300, 300, 300):
+        flt.add(watts)
+
+    assert [flt.add(5) for _ in range(4)] == [300, 300, 300, 5]
+    assert flt.last_rejected is False
+
+
+def test_small_window_disables_filtering():
+    flt = HampelFilter(window=1)
+    for watts in (300, 300, 300):
+        flt.add(watts)
+
+    assert flt.add(2) == 2
+    assert flt.add(None) is None
+    assert flt.stats()["rejected"] == 0
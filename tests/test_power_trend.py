@@ -0,0 +1,26 @@
+import pytest
+
+from services.power_trend import PowerTrend
+
+
+def test_slope_and_prediction_on_falling_draw():
+    trend = PowerTrend(tau_sec=1, window=4)
+    for ts, watts in [(0, 500), (100, 400), (200, 300), (300, 200)]:
+        trend.add(ts, watts)
+
+    assert trend.slope() == pytest.approx(-1.0)
+    # tau far below the sample spacing: the level follows the latest reading.
+    assert trend.ewma == pytest.approx(200, abs=0.1)
+    assert trend.seconds_until(20) == pytest.approx(180, abs=1)
+
+
+def test_flat_or_rising_draw_has_no_prediction():
+    trend = PowerTrend(window=3)
+    assert trend.seconds_until(20) is None
+    for ts in range(5):
+        trend.add(ts * 60, 480 + ts)
+
+    assert len(trend) == 3
+    assert trend.seconds_until(20) is None
+    trend.reset()
+    assert trend.stats() == {"ewma_w": None, "slope_w_per_min": None, "samples": 0}
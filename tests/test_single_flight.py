@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_request():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(flight.do("power", fetch) for _ in range(5)))
+
+    assert results == [1, 1, 1, 1, 1]
+    assert calls == 1
+    assert flight.coalesced == 4
+
+
+@pytest.mark.asyncio
+async def test_max_age_reuses_recent_result():
+    now = 100.0
+    flight = SingleFlight(clock=lambda: now)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await flight.do("state", fetch) == 1
+    now += 3
+    assert await flight.do("state", fetch, max_age=5) == 1
+    now += 3
+    assert await flight.do("state", fetch, max_age=5) == 2
+    assert await flight.do("state", fetch) == 3
+
+
+@pytest.mark.asyncio
+async def test_failure_is_shared_and_not_cached():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("403")
+
+    results = await asyncio.gather(flight.do("state", fail), flight.do("state", fail), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    with pytest.raises(RuntimeError):
+        await flight.do("state", fail, max_age=60)
@@ -0,0 +1,202 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import services.tapo as tapo_module
+import services.tapo_manager as manager_module
+from controllers.tapo import TapoController
+from services.tapo import TapoService
+
+
+class FakeDevice:
+    def __init__(self, fail_info=False):
+        self.fail_info = fail_info
+
+    async def get_device_info(self):
+        if self.fail_info:
+            raise RuntimeError("403")
+        return {"device_on": True}
+
+    async def on(self):
+        raise RuntimeError("device busy")
+
+
+class FakeApiClient:
+    logins = 0
+
+    def __init__(self, username, password):
+        self.username = username
+        self.password = password
+
+    async def p110(self, ip_address):
+        FakeApiClient.logins += 1
+        return FakeDevice()
+
+
+async def reachable(self, timeout=None, use_breaker=True):
+    return True
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    FakeApiClient.logins = 0
+    monkeypatch.setattr(tapo_module, "ApiClient", FakeApiClient)
+    monkeypatch.setattr(TapoService, "probe", reachable)
+    return FakeApiClient
+
+
+@pytest.mark.asyncio
+async def test_initialize_reuses_cached_session(fake_client):
+    service = TapoService("u", "p", "1.2.3.4")
+
+    await service.initialize()
+    await service.initialize()
+    await service.initialize()
+
+    assert fake_client.logins == 1
+    assert service.cache_misses == 1
+    assert service.cache_hits == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_session_triggers_login(fake_client):
+    service = TapoService("u", "p", "1.2.3.4")
+    service.session_ttl_sec = 0
+
+    await service.initialize()
+    await service.initialize()
+
+    assert fake_client.logins == 2
+    assert service.cache_hits == 0
+
+
+@pytest.mark.asyncio
+async def test_failure_invalidates_session(fake_client):
+    service = TapoService("u", "p", "1.2.3.4")
+    await service.initialize()
+    service.device.fail_info = True
+
+    with pytest.raises(RuntimeError):
+        await service.get_state()
+
+    assert service.session_valid() is False
+    await service.initialize()
+    assert fake_client.logins == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_toggle_counts_one_breaker_failure(fake_client):
+    service = TapoService("u", "p", "1.2.3.4")
+    await service.initialize()
+
+    with pytest.raises(RuntimeError):
+        await service.turn_on()
+
+    assert fake_client.logins == 2
+    assert service.breaker.consecutive_failures == 1
+    assert service.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_controller_status_probes_only_before_a_fresh_login(fake_client, monkeypatch):
+    probes = []
+
+    async def counting_probe(self, timeout=None, use_breaker=True):
+        probes.append(self.ip_address)
+        return True
+
+    async def device_info(self):
+        return SimpleNamespace(device_on=True)
+
+    monkeypatch.setattr(TapoService, "probe", counting_probe)
+    monkeypatch.setattr(FakeDevice, "get_device_info", device_info)
+    controller = TapoController(TapoService("u", "p", "1.2.3.4"))
+
+    await controller.get_status()
+    await controller.get_status()
+    await controller.get_status()
+
+    assert probes == ["1.2.3.4"]
+    assert fake_client.logins == 1
+    assert controller.status.get_status()["online"] is True
+
+
+@pytest.mark.asyncio
+async def test_manager_shares_client_and_caps_in_flight(monkeypatch):
+    in_flight = 0
+    peak = 0
+
+    class SlowDevice(FakeDevice):
+        async def get_device_info(self):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"device_on": True}
+
+    class SharedClient(FakeApiClient):
+        created = 0
+
+        def __init__(self, username, password):
+            super().__init__(username, password)
+            SharedClient.created += 1
+
+        async def p110(self, ip_address):
+            return SlowDevice()
+
+    monkeypatch.setattr(manager_module, "ApiClient", SharedClient)
+    monkeypatch.setattr(TapoService, "probe", reachable)
+    manager = manager_module.TapoClientManager(max_in_flight=2)
+    for idx in range(4):
+        manager.service(ip_address=f"10.0.0.{idx}", username="u", password="p")
+
+    assert manager.service(ip_address="10.0.0.1", username="u", password="p") is manager.services()["10.0.0.1"]
+
+    results = await manager.poll_all()
+
+    assert len(results) == 4
+    assert all(result == {"device_on": True} for result in results.values())
+    assert SharedClient.created == 1
+    assert peak <= 2
+
+
+def test_manager_looks_up_registered_plug_before_building_a_service(monkeypatch):
+    monkeypatch.setenv("TAPO_IP_ADDRESS", "10.0.0.9")
+    monkeypatch.delenv("CHARGING_SOCKET_DEVICE_ID", raising=False)
+    built = []
+
+    class CountingService(TapoService):
+        def __init__(self, *args, **kwargs):
+            built.append(kwargs.get("ip_address"))
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(manager_module, "TapoService", CountingService)
+    manager = manager_module.TapoClientManager()
+
+    first = manager.service()
+    assert manager.service() is first
+    assert manager.service(ip_address="10.0.0.9") is first
+    assert built == ["10.0.0.9"]
+
+
+@pytest.mark.asyncio
+async def test_probe_records_latency_and_skips_login_when_unreachable(monkeypatch):
+    FakeApiClient.logins = 0
+    monkeypatch.setattr(tapo_module, "ApiClient", FakeApiClient)
+    server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    service = TapoService("u", "p", "127.0.0.1")
+    service.probe_port = port
+
+    assert await service.probe() is True
+    server.close()
+    await server.wait_closed()
+    assert await service.probe() is False
+    assert service.probe_latency.successes == 1
+    assert service.probe_latency.failures == 1
+
+    with pytest.raises(tapo_module.TapoUnreachableError):
+        await service.initialize()
+    assert FakeApiClient.logins == 0
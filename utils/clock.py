@@ -0,0 +1,75 @@
+import asyncio
+import selectors
+import time
+from datetime import datetime, timedelta
+
+
+# Lightweight clock wrapper to ease testing.
+class Clock:
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """Simulated time for running long scenarios in seconds.
+
+    Code must run on the loop from ``new_event_loop()`` (or via ``run()``): that
+    loop reads its time from this clock and, instead of blocking in select, jumps
+    straight to the next scheduled timer. ``asyncio.sleep``/``wait_for`` and the
+    ``sleep`` method therefore all advance virtual time.
+    """
+
+    def __init__(self, start: datetime | None = None):
+        self.start = start or datetime(2024, 1, 1)
+        self.elapsed = 0.0
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.elapsed)
+
+    def monotonic(self) -> float:
+        return self.elapsed
+
+    def advance(self, seconds: float):
+        self.elapsed += max(seconds, 0.0)
+
+    def new_event_loop(self) -> asyncio.AbstractEventLoop:
+        return _VirtualTimeLoop(self)
+
+    def run(self, coro):
+        loop = self.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+
+class _VirtualSelector:
+    """Poll real file descriptors without blocking; an idle wait advances the virtual clock instead."""
+
+    def __init__(self, clock: VirtualClock):
+        self._virtual_clock = clock
+        self._selector = selectors.DefaultSelector()
+
+    def select(self, timeout=None):
+        events = self._selector.select(0)
+        if not events and timeout:
+            self._virtual_clock.advance(timeout)
+        return events
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class _VirtualTimeLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock: VirtualClock):
+        self._virtual_clock = clock
+        super().__init__(_VirtualSelector(clock))
+
+    def time(self) -> float:
+        return self._virtual_clock.elapsed
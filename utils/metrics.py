@@ -0,0 +1,69 @@
+from collections import deque
+from typing import Deque, Optional
+
+
+class LatencyRecorder:
+    """Keep the most recent latency samples (seconds) plus success/failure counters."""
+
+    def __init__(self, maxlen: int = 100):
+        self.samples: Deque[float] = deque(maxlen=maxlen)
+        self.successes = 0
+        self.failures = 0
+        self.last: Optional[float] = None
+
+    def record(self, seconds: float, ok: bool = True):
+        self.last = seconds
+        self.samples.append(seconds)
+        if ok:
+            self.successes += 1
+        else:
+            self.failures += 1
+
+    def summary(self) -> dict:
+        ordered = sorted(self.samples)
+        count = len(ordered)
+        return {
+            "count": count,
+            "successes": self.successes,
+            "failures": self.failures,
+            "last_ms": round(self.last * 1000, 1) if self.last is not None else None,
+            "p50_ms": round(ordered[count // 2] * 1000, 1) if count else None,
+            "max_ms": round(ordered[-1] * 1000, 1) if count else None,
+        }
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (seconds) with a timeout counter."""
+
+    DEFAULT_BOUNDS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+    def __init__(self, bounds: tuple = DEFAULT_BOUNDS):
+        self.bounds = tuple(sorted(bounds))
+        # One extra bucket for values above the last bound.
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.timeouts = 0
+
+    def record(self, seconds: float):
+        index = len(self.bounds)
+        for idx, bound in enumerate(self.bounds):
+            if seconds <= bound:
+                index = idx
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+
+    def record_timeout(self):
+        self.timeouts += 1
+
+    def summary(self) -> dict:
+        buckets = {f"<={bound:g}s": count for bound, count in zip(self.bounds, self.counts)}
+        buckets[f">{self.bounds[-1]:g}s"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "timeouts": self.timeouts,
+            "mean_s": round(self.total / self.count, 3) if self.count else None,
+            "buckets": buckets,
+        }
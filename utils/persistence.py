@@ -0,0 +1,29 @@
+import json
+import os
+from typing import Optional
+
+
+def write_json_atomic(path: str, data: dict, durable: bool = False):
+    """Write ``data`` to a temp file and rename it over ``path`` so readers never see a partial file.
+
+    With ``durable`` the temp file is fsynced before the rename, so the snapshot
+    also survives a power cut right after the write.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_json(path: str) -> Optional[dict]:
+    """Return the JSON object stored at ``path``, or None if it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None